@@ -0,0 +1,59 @@
+# Benchmark of tokenizing lines that all have errors
+# Compares the `scan_` readers, which return errors, with raising the
+# errors they return and catching them, as `expect` did before, on the
+# lines of the "error_dense" corpus that really have an error.
+# Usage: python benchmarks/bench_errors.py [lines]
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mccmdhl.command import CommandTokenizer
+from mccmdhl.tokenizer_base import TokenType
+from mccmdhl.error import Error
+
+from corpora import error_dense
+
+class RaisingCommandTokenizer(CommandTokenizer):
+    # Raises the errors returned by the readers given to `expect`
+    def expect(self, func, token):
+        try:
+            res = func()
+            if type(res) is Error:
+                raise res
+            return res
+        except Error as err:
+            token.type = TokenType.error
+            token.value = err
+            return None
+
+def error_lines(lines: int) -> str:
+    # `lines` lines of the corpus that have at least one error
+    res = []
+    seed = 0
+    while len(res) < lines:
+        for line in error_dense(lines, seed).split("\n"):
+            tokens = CommandTokenizer(line).get_tokens()
+            if any(tok.type is TokenType.error for tok in tokens):
+                res.append(line)
+        seed += 1
+    return "\n".join(res[:lines])
+
+def per_line_us(tokenizer_class, src: str, number = 3):
+    seconds = min(timeit.repeat(
+        lambda: tokenizer_class(src), number=number, repeat=3
+    ))
+    return seconds / number / (src.count("\n") + 1) * 1e6
+
+def main(lines: int = 5000):
+    src = error_lines(lines)
+    print("%-28s %12s %12s" % ("", "before(us)", "after(us)"))
+    print("%-28s %12.2f %12.2f" % (
+        "per line with an error",
+        per_line_us(RaisingCommandTokenizer, src),
+        per_line_us(CommandTokenizer, src)
+    ))
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
@@ -0,0 +1,54 @@
+# Benchmark of reading options
+# Compares reading options through constant `Keywords` against checking
+# the word in the tuple passed by every call and listing the options of every
+# error at once, as it did before, on option heavy corpora.
+# Usage: python benchmarks/bench_options.py [lines]
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mccmdhl.command import CommandTokenizer
+from mccmdhl.tokenizer_base import TokenType
+from mccmdhl.error import Error, ErrorType, OptionList, Keywords
+
+from corpora import scoreboard_operations, execute_chains, error_dense
+
+class OldOptionsTokenizer(CommandTokenizer):
+    # The call sites now pass `Keywords` constants; the word is checked in
+    # their tuple of options instead
+    def token_options(self, *options):
+        return self.token_options_in(options)
+
+    def token_options_in(self, options):
+        if type(options) is Keywords:
+            options = options.order
+        with self.create_token(TokenType.option) as tok:
+            option = self.expect(self.scan_word, tok)
+            if option is not None and option not in options:
+                tok.type = TokenType.error
+                tok.value = Error(
+                    ErrorType.INVALID_OPTION, option=option,
+                    correct=OptionList(options)
+                )
+                return None
+        return option
+
+def per_line_us(tokenizer_class, src: str, number = 3):
+    seconds = min(timeit.repeat(
+        lambda: tokenizer_class(src), number=number, repeat=5
+    ))
+    return seconds / number / (src.count("\n") + 1) * 1e6
+
+def main(lines: int = 3000):
+    print("%-24s %12s %12s" % ("", "before(us)", "after(us)"))
+    for make in (scoreboard_operations, execute_chains, error_dense):
+        src = make(lines, 0)
+        print("%-24s %12.2f %12.2f" % (
+            make.__name__, per_line_us(OldOptionsTokenizer, src),
+            per_line_us(CommandTokenizer, src)
+        ))
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
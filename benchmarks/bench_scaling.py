@@ -0,0 +1,58 @@
+# Scaling benchmark of the tokenizers
+# Tokenizes inputs from 1 KB to 10 MB and prints the time spent per KB,
+# which should stay (roughly) constant if tokenizing is linear.
+# Usage: python benchmarks/bench_scaling.py [max_size_in_KB]
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mccmdhl.command import CommandTokenizer
+from mccmdhl.json_helper import JSONTokenizer
+
+LINES = (
+    "# Generated by bench_scaling.py",
+    "execute as @a[tag=lobby,scores={state=1..}] at @s run tp @s ~ ~1 ~",
+    "scoreboard players operation @s score += @p[r=10] score",
+    'tellraw @a {"rawtext":[{"text":"Hello "},{"selector":"@s"}]}',
+    'fill ~ ~ ~ ~5 ~5 ~5 stone ["stone_type":"granite"] replace',
+    "say this line is just some text",
+)
+
+def command_source(size: int):
+    # mcfunction source of about `size` characters
+    block = "\n".join(LINES) + "\n"
+    return (block * (size // len(block) + 1))[:size]
+
+def json_source(size: int):
+    # a single-line JSON array of about `size` characters
+    item = '{"text":"abc","n":-1.5,"b":true},'
+    return "[" + item * (size // len(item)) + "1]"
+
+def measure(func, src: str):
+    begin = time.perf_counter()
+    func(src)
+    return time.perf_counter() - begin
+
+def main(max_kb: int = 10 * 1024):
+    tokenizers = (
+        ("CommandTokenizer", command_source, CommandTokenizer),
+        ("JSONTokenizer", json_source,
+         lambda src: JSONTokenizer(src).get_tokens()),
+    )
+    print("%-18s %10s %10s %12s" % (
+        "tokenizer", "size(KB)", "time(s)", "us/KB"
+    ))
+    for name, make_source, func in tokenizers:
+        kb = 1
+        while kb <= max_kb:
+            src = make_source(kb * 1024)
+            seconds = measure(func, src)
+            print("%-18s %10d %10.3f %12.1f" % (
+                name, kb, seconds, seconds / kb * 1e6
+            ))
+            kb *= 10
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
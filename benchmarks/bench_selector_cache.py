@@ -0,0 +1,58 @@
+# Benchmark of the selector cache
+# Tokenizes the corpora with and without a `selector_cache` shared by all
+# the lines, and prints the time per line and the hit rate reported by a
+# `Profiler`. The corpora make every selector at random, so they show the
+# cost of misses; "pack_like" uses a few selectors many times, like real
+# packs do.
+# Usage: python benchmarks/bench_selector_cache.py [lines]
+import os
+import sys
+import random
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mccmdhl.command import CommandTokenizer
+from mccmdhl.cache import LRUCache
+from mccmdhl.profiler import Profiler
+
+from corpora import COMMAND_CORPORA, _selector
+
+def pack_like(lines: int, seed: int = 0) -> str:
+    # Commands using 32 different selectors
+    rnd = random.Random(seed)
+    selectors = [_selector(rnd, rnd.randint(1, 5)) for _ in range(32)]
+    return "\n".join(
+        rnd.choice((
+            "execute as %s at @s if entity %s run tp @s ~ ~1 ~",
+            "execute as %s run tag %s add red",
+            "scoreboard players operation %s kills += %s kills",
+        )) % (rnd.choice(selectors), rnd.choice(selectors))
+        for _ in range(lines)
+    )
+
+def per_line_us(src: str, make_cache, number = 3):
+    seconds = min(timeit.repeat(
+        lambda: CommandTokenizer(src, selector_cache=make_cache()),
+        number=number, repeat=3
+    ))
+    return seconds / number / (src.count("\n") + 1) * 1e6
+
+def hit_rate(src: str) -> float:
+    profiler = Profiler()
+    CommandTokenizer(src, profiler=profiler, selector_cache=LRUCache())
+    info = profiler.cache_info().get("selector_cache")
+    return info["hit_rate"] if info else 0.0
+
+def main(lines: int = 2000):
+    print("%-24s %12s %12s %10s" % ("", "before(us)", "after(us)", "hits"))
+    corpora = dict(COMMAND_CORPORA, pack_like=pack_like)
+    for name, make in corpora.items():
+        src = make(lines, 0)
+        print("%-24s %12.2f %12.2f %9.1f%%" % (
+            name, per_line_us(src, lambda: None),
+            per_line_us(src, LRUCache), hit_rate(src) * 100
+        ))
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
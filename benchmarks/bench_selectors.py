@@ -0,0 +1,161 @@
+# Benchmark of selectors with many arguments
+# Compares the table driven `token_target` with the `if`/`elif` chain it
+# replaced on the "long_selectors" corpus (8 to 12 arguments in every
+# selector).
+# Usage: python benchmarks/bench_selectors.py [lines]
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mccmdhl.command import CommandTokenizer
+from mccmdhl.tokenizer_base import TokenType
+from mccmdhl.error import Error, ErrorType, WarningType
+from mccmdhl.version_control import VersionedMethod, MIN_VERSION
+
+from corpora import long_selectors
+
+class OldSelectorTokenizer(CommandTokenizer):
+    # The old `token_target`
+    _selector_args = VersionedMethod()
+
+    @_selector_args.variation(version=MIN_VERSION)
+    def _selector_args_oldest(self):
+        return (
+            "x", "y", "z", "dx", "dy", "dz", "r", "rm",
+            "scores", "tag", "name", "type", "family", "rx",
+            "rxm", "ry", "rym", "hasitem", "l", "lm", "m", "c"
+        )
+
+    @_selector_args.variation(version=(1, 19, 80))
+    def _selector_args_1_19_80(self):
+        return self._selector_args_oldest() + ("haspermission",)
+
+    def token_target(self):
+        def _handle_scores():
+            for _ in self.token_list("{", "}", allow_empty=False):
+                with self.create_token(TokenType.scoreboard) as tok:
+                    self.expect(self.scan_string, tok)
+                self.expect_char("=")
+                with self.create_token(TokenType.number) as tok:
+                    self.expect(self.scan_number_range, tok)
+
+        def _hasitem_component():
+            args = []
+            for _ in self.token_list("{", "}", allow_empty=False):
+                arg = self.token_options(
+                    "item", "data", "quantity", "location", "slot"
+                )
+                args.append(arg)
+                self.expect_char("=")
+                if arg == "item":
+                    self.token_namespaced_id()
+                elif arg == "data":
+                    with self.create_token(TokenType.number) as tok:
+                        value = self.expect(self.scan_integer, tok)
+                    if value and value < 0:
+                        self.warn_at(tok, WarningType.DANGEROUS_HASITEM_DATA)
+                elif arg in ("quantity", "slot"):
+                    with self.create_token(TokenType.number) as tok:
+                        self.expect(self.scan_number_range, tok)
+                elif arg == "location":
+                    with self.create_token(TokenType.string) as tok:
+                        self.expect(self.scan_word, tok)
+            if "item" not in args:
+                with self.create_token(
+                    TokenType.error, Error(ErrorType.HASITEM_MISSING_ITEM)
+                ): pass
+
+        def _handle_hasitem():
+            if self.current_char == "[":
+                for _ in self.token_list("[", "]", allow_empty=False):
+                    _hasitem_component()
+            else:
+                _hasitem_component()
+
+        def _handle_haspermission():
+            for _ in self.token_list("{", "}", allow_empty=False):
+                self.token_permission()
+                self.expect_char("=")
+                self.token_state()
+
+        if self.current_char != "@":
+            with self.create_token(TokenType.selector) as tok:
+                self.expect(self.scan_string, tok)
+        else:
+            with self.create_token(TokenType.selector) as tok:
+                self.forward()
+                var = self.expect(self.scan_word, tok)
+                if (var is not None) and var not in (
+                    "a", "e", "r", "s", "p", "c", "v", "initiator"
+                ):
+                    tok.type = TokenType.error
+                    tok.value = Error(ErrorType.INVALID_SELECTOR_TYPE, var=var)
+            if self.current_char == "[":
+                for _ in self.token_list("[", "]", allow_empty=False):
+                    arg = self.token_options(*self._selector_args())
+                    self.expect_char("=")
+                    if arg in ("r", "rm"):
+                        self.token_number(check_min=0)
+                    if arg in (
+                        "dx", "dy", "dz", "rx", "rxm", "ry", "rym"
+                    ):
+                        self.token_number()
+                    elif arg == "c":
+                        self.token_integer()
+                    elif arg in ("l", "lm"):
+                        self.token_integer(check_min=0)
+                    elif arg in ("name", "family"):
+                        if self.current_char == "!":
+                            self.char("!")
+                        self.token_string()
+                    elif arg == "type":
+                        if self.current_char == "!":
+                            self.char("!")
+                        self.token_namespaced_id()
+                    elif arg in ("x", "y", "z"):
+                        with self.create_token(TokenType.pos) as tok:
+                            kind = self.expect(self.scan_pos, tok)
+                            if kind == "local":
+                                tok.type = TokenType.error
+                                tok.value = Error(
+                                    ErrorType.LOCAL_POS_FOR_SELECTOR
+                                )
+                    elif arg == "scores":
+                        _handle_scores()
+                    elif arg == "tag":
+                        if self.current_char == "!":
+                            self.char("!")
+                        if not self.next_is_terminating_char() or \
+                            self.current_char == '"':
+                            with self.create_token(TokenType.tag) as tok:
+                                self.expect(self.scan_string, tok)
+                    elif arg == "hasitem":
+                        _handle_hasitem()
+                    elif arg == "m":
+                        if self.current_char == "!":
+                            self.char("!")
+                        self.token_gamemode_option()
+                    elif arg == "haspermission":
+                        _handle_haspermission()
+        self.skip_spaces()
+
+def per_line_us(tokenizer_class, src: str, number = 3):
+    seconds = min(timeit.repeat(
+        lambda: tokenizer_class(src), number=number, repeat=5
+    ))
+    return seconds / number / (src.count("\n") + 1) * 1e6
+
+def main(lines: int = 5000):
+    src = long_selectors(lines)
+    print("%-28s %12s %12s" % ("", "before(us)", "after(us)"))
+    for version in ((1, 19, 70), (1, 20, 0)):
+        print("%-28s %12.2f %12.2f" % (
+            "per line, %s" % ".".join(map(str, version)),
+            per_line_us(OldSelectorTokenizer.specialize(version), src),
+            per_line_us(CommandTokenizer.specialize(version), src)
+        ))
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
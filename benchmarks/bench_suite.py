@@ -0,0 +1,137 @@
+# Benchmark suite of the tokenizers on representative corpora
+# Tokenizes every corpus of `corpora.py` with `CommandTokenizer` for every
+# version from `MIN_VERSION` to 1.20.0 (and the JSON corpora with
+# `JSONTokenizer`), and prints the tokens/s, lines/s and peak memory as
+# JSON, so that results of different releases can be compared.
+# Usage: python benchmarks/bench_suite.py [--lines N] [--repeat N]
+#            [--corpus NAME]... [--output FILE]
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mccmdhl.command import CommandTokenizer
+from mccmdhl.json_helper import JSONTokenizer
+from mccmdhl.version_control import MIN_VERSION
+
+from corpora import COMMAND_CORPORA, JSON_CORPORA
+
+MAX_VERSION = (1, 20, 0)
+
+def versions() -> list:
+    # Every version in which `CommandTokenizer` behaves differently
+    return sorted(
+        version for version in
+        CommandTokenizer.get_all_versions() | {MIN_VERSION}
+        if MIN_VERSION <= version <= MAX_VERSION
+    )
+
+def measure(tokenize, src: str, repeat: int) -> dict:
+    # Run `tokenize(src)` (which returns the tokens) `repeat` times and
+    # once more under `tracemalloc` for the peak memory
+    seconds = float("inf")
+    for _ in range(repeat):
+        begin = time.perf_counter()
+        tokens = tokenize(src)
+        seconds = min(seconds, time.perf_counter() - begin)
+    token_count = len(tokens)
+    del tokens
+    tracemalloc.start()
+    try:
+        tokenize(src)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    line_count = src.count("\n") + 1
+    return {
+        "lines": line_count,
+        "tokens": token_count,
+        "seconds": seconds,
+        "lines_per_sec": line_count / seconds,
+        "tokens_per_sec": token_count / seconds,
+        "peak_memory": peak,
+    }
+
+def run(lines: int, seed: int = 0, repeat: int = 3, corpus_names = None):
+    # Results of every (tokenizer, version, corpus) as a list of dicts
+    def _selected(corpora: dict):
+        return [
+            (name, make) for name, make in corpora.items()
+            if corpus_names is None or name in corpus_names
+        ]
+    results = []
+    for name, make in _selected(COMMAND_CORPORA):
+        src = make(lines, seed)
+        for version in versions():
+            tokenizer_class = CommandTokenizer.specialize(version)
+            result = {
+                "tokenizer": "CommandTokenizer",
+                "version": ".".join(map(str, version)),
+                "corpus": name,
+            }
+            result.update(measure(
+                lambda src: tokenizer_class(src).get_tokens(), src, repeat
+            ))
+            results.append(result)
+    for name, make in _selected(JSON_CORPORA):
+        src = make(lines, seed)
+        result = {
+            "tokenizer": "JSONTokenizer",
+            "version": None, # JSON does not depend on the version
+            "corpus": name,
+        }
+        result.update(measure(
+            lambda src: JSONTokenizer(src).get_tokens(), src, repeat
+        ))
+        results.append(result)
+    return results
+
+def main(argv = None):
+    parser = argparse.ArgumentParser(
+        description="Benchmark the tokenizers and print the result as JSON."
+    )
+    parser.add_argument(
+        "--lines", type=int, default=2000,
+        help="lines of every corpus (default: 2000)"
+    )
+    parser.add_argument(
+        "--seed", type=int, default=0,
+        help="seed of the corpora (default: 0)"
+    )
+    parser.add_argument(
+        "--repeat", type=int, default=3,
+        help="timing runs, of which the fastest is kept (default: 3)"
+    )
+    parser.add_argument(
+        "--corpus", action="append", default=None, metavar="NAME",
+        choices=sorted(COMMAND_CORPORA.keys() | JSON_CORPORA.keys()),
+        help="only run this corpus (can be repeated)"
+    )
+    parser.add_argument(
+        "-o", "--output", default=None, metavar="FILE",
+        help="write the JSON to FILE instead of stdout"
+    )
+    args = parser.parse_args(argv)
+    report = {
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "lines": args.lines,
+        "seed": args.seed,
+        "repeat": args.repeat,
+        "results": run(args.lines, args.seed, args.repeat, args.corpus),
+    }
+    if args.output is None:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+    else:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(report, file, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+# Microbenchmark of token creation
+# Compares `Tokenizer.create_token` with the `contextlib.contextmanager`
+# based implementation it replaced, both for an empty token and for
+# tokenizing a small mcfunction file.
+# Usage: python benchmarks/bench_token_builder.py
+import os
+import sys
+import timeit
+import contextlib
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mccmdhl.tokenizer_base import Token, TokenType, Tokenizer
+from mccmdhl.command import CommandTokenizer
+
+class ContextManagerMixin:
+    # The old generator based `create_token`
+    @contextlib.contextmanager
+    def create_token(self, type = None, value = None):
+        tok = Token(type, self.cursor, None, value, self.lines)
+        yield tok
+        tok.end = self.cursor
+        assert tok.type is not None
+        self.tokens.append(tok)
+
+class OldTokenizer(ContextManagerMixin, Tokenizer):
+    pass
+
+class OldCommandTokenizer(ContextManagerMixin, CommandTokenizer):
+    pass
+
+SOURCE = "\n".join((
+    "execute as @a[tag=lobby,scores={state=1..}] at @s run tp @s ~ ~1 ~",
+    "scoreboard players operation @s score += @p[r=10] score",
+    'tellraw @a {"rawtext":[{"text":"Hello "},{"selector":"@s"}]}',
+    "fill ~ ~ ~ ~5 ~5 ~5 stone replace",
+) * 250)
+
+def per_token_ns(tokenizer_class, number = 200000):
+    tokenizer = tokenizer_class("")
+    def _create():
+        with tokenizer.create_token(TokenType.string):
+            pass
+    seconds = min(timeit.repeat(_create, number=number, repeat=5))
+    return seconds / number * 1e9
+
+def per_file_token_ns(tokenizer_class, number = 5):
+    token_count = len(tokenizer_class(SOURCE).get_tokens())
+    seconds = min(timeit.repeat(
+        lambda: tokenizer_class(SOURCE), number=number, repeat=3
+    ))
+    return seconds / number / token_count * 1e9
+
+def main():
+    print("%-28s %12s %12s" % ("", "before(ns)", "after(ns)"))
+    print("%-28s %12.0f %12.0f" % (
+        "create_token (empty token)",
+        per_token_ns(OldTokenizer), per_token_ns(Tokenizer)
+    ))
+    print("%-28s %12.0f %12.0f" % (
+        "CommandTokenizer per token",
+        per_file_token_ns(OldCommandTokenizer),
+        per_file_token_ns(CommandTokenizer)
+    ))
+
+if __name__ == "__main__":
+    main()
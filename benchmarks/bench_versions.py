@@ -0,0 +1,38 @@
+# Benchmark of tokenizing for every version
+# Compares one `CommandTokenizer` for each version with
+# `tokenize_versions`, on every corpus and on all of them together.
+# Usage: python benchmarks/bench_versions.py [lines]
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mccmdhl.command import CommandTokenizer
+from mccmdhl.multiversion import tokenize_versions, all_versions
+
+from corpora import COMMAND_CORPORA
+
+def separately(src: str) -> dict:
+    return {
+        version: CommandTokenizer.specialize(version)(src)
+        for version in all_versions()
+    }
+
+def seconds(func, src: str) -> float:
+    return min(timeit.repeat(lambda: func(src), number=1, repeat=3))
+
+def main(lines: int = 2000):
+    corpora = {
+        name: make(lines, 0) for name, make in COMMAND_CORPORA.items()
+    }
+    corpora["all"] = "\n".join(corpora.values())
+    print("%d versions" % len(all_versions()))
+    print("%-24s %12s %12s" % ("", "before(s)", "after(s)"))
+    for name, src in corpora.items():
+        print("%-24s %12.3f %12.3f" % (
+            name, seconds(separately, src), seconds(tokenize_versions, src)
+        ))
+
+if __name__ == "__main__":
+    main(*map(int, sys.argv[1:]))
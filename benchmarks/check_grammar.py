@@ -0,0 +1,574 @@
+# Conformance check of the command grammar
+# `CommandTokenizer.GRAMMAR` replaced the `c_` methods of most commands.
+# This tokenizes the corpora, and random lines made of the keywords of
+# every rule and of typical arguments, with both the grammar and the old
+# methods (kept below as the reference) for every version, and reports
+# any difference in tokens or warnings, then the time of both.
+# Usage: python benchmarks/check_grammar.py [random lines per command]
+import os
+import sys
+import random
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mccmdhl.command import CommandTokenizer
+from mccmdhl.tokenizer_base import TokenType
+from mccmdhl.error import ErrorType
+from mccmdhl.grammar import Seq, Choice, If, Versions
+from mccmdhl.version_control import versioned_method, MIN_VERSION
+
+from corpora import COMMAND_CORPORA
+
+class ReferenceCommandTokenizer(CommandTokenizer):
+    # The handwritten commands (`c_` methods take precedence over rules)
+    def c_ability(self):
+        self.token_target()
+        self.token_chained_arguments(
+            lambda: self.token_options("worldbuilder", "mayfly", "mute"),
+            self.token_boolean
+        )
+
+    def c_alwaysday(self):
+        if self.line_not_end():
+            self.token_boolean()
+
+    @versioned_method(version=(1, 20, 0))
+    def c_camera(self):
+        self.token_target() # players
+        mode = self.token_options("clear", "fade", "set")
+        if mode == "fade":
+            def _color():
+                for _ in range(3): # RGB
+                    self.token_number(0.0, 1.0)
+            if self.line_not_end():
+                fade_opt = self.token_options("time", "color")
+                if fade_opt == "time":
+                    for _ in range(3): # fadeIn, hold, fadeOut
+                        self.token_number()
+                    if self.line_not_end():
+                        self.token_options("color")
+                        _color()
+                elif fade_opt == "color":
+                    _color()
+        elif mode == "set":
+            self.token_string() # preset
+            set_opt = None
+            if self.line_not_end():
+                set_opt = self.token_options("ease", "pos", "rot", "default")
+                if set_opt == "ease":
+                    set_opt = None
+                    self.token_number() # easeTime
+                    # easeType
+                    EASE_TYPES = ["linear", "spring"]
+                    for x in ("in_", "out_", "in_out_"):
+                        for y in ("back", "bounce", "circ", "cubic", "elastic",
+                                  "expo", "quad", "quart", "quint", "sine"):
+                            EASE_TYPES.append(x + y)
+                    self.token_options(*EASE_TYPES)
+                    if self.line_not_end():
+                        set_opt = self.token_options("pos", "rot", "default")
+            def _rot():
+                self.token_rotation()
+                self.token_rotation()
+            if set_opt == "pos":
+                self.token_full_pos()
+                if self.line_not_end():
+                    self.token_options("rot")
+                    _rot()
+            elif set_opt == "rot":
+                _rot()
+
+    def c_camerashake(self):
+        mode = self.token_options("add", "stop")
+        if mode == "add":
+            self.token_target()
+            self.token_chained_arguments(
+                lambda: self.token_number(0, 4), # intensity
+                self.token_number, # seconds
+                lambda: self.token_options("positional", "rotational")
+            )
+        elif mode == "stop":
+            if self.line_not_end():
+                self.token_target()
+
+    def c_clear(self):
+        self.token_chained_arguments(
+            self.token_target,
+            self.token_namespaced_id, # item id
+            lambda: self.token_integer(check_min=-1), # data
+            lambda: self.token_integer(check_min=-1) # max count
+        )
+
+    def c_clearspawnpoint(self):
+        if self.line_not_end():
+            self.token_target()
+
+    def c_clone(self):
+        CLONEMODES = ("force", "move", "normal")
+        for _ in range(3):
+            self.token_full_pos()
+        if self.line_not_end():
+            maskmode = self.token_options("masked", "replace", "filtered")
+            if maskmode == "filtered":
+                self.token_options(*CLONEMODES)
+                self.token_namespaced_id()
+                self.token_bs_or_data()
+            else:
+                if self.line_not_end():
+                    self.token_options(*CLONEMODES)
+
+    def c_damage(self):
+        self.token_target()
+        self.token_integer(check_min=0) # amount
+        if self.line_not_end():
+            with self.create_token(TokenType.string) as tok:
+                self.expect(self.scan_word, tok) # damage cause
+            if self.line_not_end():
+                self.token_options("entity")
+                self.token_target()
+
+    def c_deop(self):
+        self.token_target()
+
+    def c_dialogue(self):
+        mode = self.token_options("change", "open")
+        self.token_target() # npc
+        if mode == "change":
+            self.token_string() # sceneName
+            if self.line_not_end():
+                self.token_target() # players
+        elif mode == "open":
+            self.token_target() # player
+            if self.line_not_end():
+                self.token_string() # sceneName
+
+    def c_event(self):
+        self.token_options("entity")
+        self.token_target()
+        self.token_string()
+
+    def c_fill(self):
+        for _ in range(2):
+            self.token_full_pos()
+        self.token_namespaced_id()
+        if self.line_not_end():
+            self.token_bs_or_data()
+            if self.line_not_end():
+                mode = self.token_options(
+                    "destroy", "hollow", "keep", "outline", "replace"
+                )
+                if mode == "replace" and self.line_not_end():
+                    self.token_namespaced_id()
+                    if self.line_not_end():
+                        self.token_bs_or_data()
+
+    def c_fog(self):
+        self.token_target()
+        mode = self.token_options("push", "pop", "remove")
+        if mode == "push":
+            self.token_namespaced_id() # Fog id
+        self.token_string() # userProvidedID
+
+    def c_function(self):
+        self.token_skip_line(ErrorType.EXP_FUNCTION_PATH, required=True)
+
+    def c_gamemode(self):
+        self.token_gamemode_option()
+        if self.line_not_end():
+            self.token_target()
+
+    def c_give(self):
+        self.token_target()
+        self.token_namespaced_id() # item
+        self.token_chained_arguments(
+            lambda: self.token_integer(1, 32767), # amount
+            lambda: self.token_integer(0, 32767), # data
+            lambda: self.token_json("object") # component
+        )
+
+    def c_immutableworld(self):
+        if self.line_not_end():
+            self.token_boolean()
+
+    @versioned_method(version=(1, 19, 80))
+    def c_inputpermission(self):
+        mode = self.token_options("query", "set")
+        self.token_target()
+        self.token_permission()
+        # In query mode, state is optional and in set mode its required
+        if mode == "set" or self.line_not_end():
+            self.token_state()
+
+    def c_kick(self):
+        self.token_target()
+        self.skip_line() # reason (optional)
+
+    def c_kill(self):
+        if self.line_not_end():
+            self.token_target()
+
+    def c_list(self):
+        pass
+
+    def c_locate(self):
+        mode = self.token_options("biome", "structure")
+        if mode == "biome":
+            self.token_namespaced_id()
+        elif mode == "structure":
+            self.token_namespaced_id()
+            if self.line_not_end():
+                self.token_boolean()
+
+    def c_me(self):
+        self.token_skip_line()
+
+    def c_mobevent(self):
+        self.token_namespaced_id()
+        if self.line_not_end():
+            self.token_boolean()
+
+    def c_tell(self):
+        self.token_target()
+        self.token_skip_line()
+
+    def c_music(self):
+        mode = self.token_options("play", "queue", "stop", "volumn")
+        def _volumn():
+            self.token_number(0, 1)
+        def _fade():
+            self.token_number(0, 10)
+        if mode == "play" or mode == "queue":
+            self.token_string()
+            self.token_chained_arguments(
+                _volumn,
+                _fade,
+                lambda: self.token_options("play_once", "loop")
+            )
+        elif mode == "stop":
+            if self.line_not_end():
+                _fade()
+        elif mode == "volumn":
+            _volumn()
+
+    def c_op(self):
+        self.token_target()
+
+    def c_particle(self):
+        self.token_namespaced_id()
+        if self.line_not_end():
+            self.token_full_pos()
+
+    def c_playanimation(self):
+        self.token_target()
+        self.token_string() # animation
+        self.token_chained_arguments(
+            self.token_string, # next state
+            self.token_number, # blend out time
+            self.token_string, # stop expression
+            self.token_string # controller
+        )
+
+    def c_playsound(self):
+        self.token_string() # sound
+        self.token_chained_arguments(
+            self.token_target, # player
+            self.token_full_pos, # position
+            lambda: self.token_number(check_min=0), # volumn
+            lambda: self.token_number(0, 256), # pitch
+            lambda: self.token_number(check_min=0) # min volumn
+        ) 
+
+    def c_reload(self):
+        pass
+
+    def c_ride(self):
+        self.token_target()
+        mode = self.token_options(
+            "start_riding", "stop_riding", "evict_riders",
+            "summon_rider", "summon_ride"
+        )
+        if mode == "start_riding":
+            self.token_target()
+            self.token_chained_arguments(
+                lambda: self.token_options("teleport_ride", "teleport_rider"),
+                lambda: self.token_options("if_group_fits", "until_full")
+            )
+        elif mode == "summon_rider":
+            self.token_namespaced_id() # entityType
+            self.token_chained_arguments(
+                self.token_spawn_event, # spawn event
+                self.token_string # name tag
+            )
+        elif mode == "summon_ride":
+            self.token_namespaced_id() # entityType
+            self.token_chained_arguments(
+                lambda: self.token_options(
+                    "skip_riders", "no_ride_change", "reassign_rides"
+                ),
+                self.token_spawn_event, # spawn event
+                self.token_string # name tag
+            )
+
+    def c_save(self):
+        self.token_options("hold", "query", "resume")
+
+    def c_say(self):
+        self.token_skip_line()
+
+    def c_schedule(self):
+        self.token_options("on_area_loaded")
+        self.token_options("add")
+        if self.next_is_pos():
+            self.token_full_pos()
+            self.token_full_pos()
+        else:
+            mode = self.token_options("circle", "tickingarea")
+            if mode == "circle":
+                self.token_circle()
+            elif mode == "tickingarea":
+                self.token_string() # name of tickingarea
+        self.token_skip_line(ErrorType.EXP_FUNCTION_PATH, required=True)
+
+    def c_seed(self):
+        pass
+
+    def c_setblock(self):
+        self.token_full_pos()
+        self.token_namespaced_id()
+        self.token_chained_arguments(
+            self.token_bs_or_data,
+            lambda: self.token_options("destroy", "keep", "replace")
+        )
+
+    def c_setmaxplayers(self):
+        self.token_integer(1, 30)
+
+    def c_setworldspawn(self):
+        if self.line_not_end():
+            self.token_full_pos()
+
+    def c_spawnpoint(self):
+        self.token_chained_arguments(
+            self.token_target,
+            self.token_full_pos
+        )
+
+    def c_stop(self):
+        pass
+
+    def c_stopsound(self):
+        self.token_target()
+        if self.line_not_end():
+            self.token_string()
+
+    def c_tag(self):
+        self.token_starrable_target()
+        mode = self.token_options("add", "remove", "list")
+        if mode == "add" or mode == "remove":
+            with self.create_token(TokenType.tag) as tok:
+                self.expect(self.scan_string, tok)
+
+    def c_tellraw(self):
+        self.token_target()
+        self.token_json("object")
+
+    def c_testfor(self):
+        self.token_target()
+
+    def c_testforblock(self):
+        self.token_full_pos()
+        self.token_namespaced_id() # block
+        if self.line_not_end():
+            self.token_bs_or_data()
+
+    def c_testforblocks(self):
+        for _ in range(3):
+            self.token_full_pos()
+        if self.line_not_end():
+            self.token_options("masked", "all")
+
+    def c_tickingarea(self):
+        mode = self.token_options(
+            "add", "remove", "remove_all", "preload", "list"
+        )
+        if mode == "add":
+            if self.next_is_pos():
+                for _ in range(2):
+                    self.token_full_pos()
+            else:
+                self.token_options("circle")
+                self.token_circle()
+            self.token_chained_arguments(
+                self.token_string, # name
+                self.token_boolean # preload
+            )
+        elif mode == "remove":
+            if self.next_is_pos():
+                self.token_full_pos()
+            else:
+                self.token_string()
+        elif mode == "preload":
+            if self.next_is_pos():
+                self.token_full_pos()
+            else:
+                self.token_string()
+            if self.line_not_end():
+                self.token_boolean() # preload
+        elif mode == "list":
+            if self.line_not_end():
+                self.token_options("all-dimensions")
+
+    def c_time(self):
+        mode = self.token_options("add", "query", "set")
+        if mode == "add":
+            self.token_integer()
+        elif mode == "query":
+            self.token_options("daytime", "gametime", "day")
+        elif mode == "set":
+            if self.next_is_number():
+                self.token_integer()
+            else:
+                self.token_options(
+                    "day", "noon", "sunrise", "sunset", "night", "midnight"
+                )
+
+    def _title(self, token_msg_func):
+        self.token_target()
+        mode = self.token_options(
+            "clear", "reset", "title", "subtitle", "actionbar", "times"
+        )
+        if mode in ("title", "subtitle", "actionbar"):
+            token_msg_func()
+        elif mode == "times":
+            for _ in range(3):
+                self.token_integer()
+
+    def c_title(self):
+        self._title(self.token_skip_line)
+
+    def c_titleraw(self):
+        self._title(lambda: self.token_json("object"))
+
+    def c_toggledownfall(self):
+        pass
+
+    def c_volumearea(self):
+        mode = self.token_options("add", "list", "remove", "remove_all")
+        if mode == "add":
+            self.token_string() # identifier
+            self.token_full_pos() # from
+            self.token_full_pos() # to
+            if self.line_not_end():
+                self.token_string() # name
+        elif mode == "list":
+            if self.line_not_end():
+                self.token_options("all-dimensions")
+        elif mode == "remove":
+            if self.next_is_pos():
+                self.token_full_pos()
+            else:
+                self.token_string()
+
+    def c_worldbuilder(self):
+        pass
+
+    def c_weather(self):
+        mode = self.token_options("clear", "rain", "thunder", "query")
+        if mode in ("clear", "rain", "thunder"):
+            if self.line_not_end():
+                self.token_integer(0, 1000000) # duration
+
+    def c_whitelist(self):
+        mode = self.token_options(
+            "add", "list", "off", "on", "reload", "remove"
+        )
+        if mode == "add" or mode == "remove":
+            self.token_target()
+
+VALUES = (
+    "@s", "@e[type=cow,r=3]", "@a[", "alice", '"a b"', "*", "~", "~1 ~ ~-2",
+    "^ ^ ^1", "1 2 3", "0", "1", "-1", "3.5", "300", "1000001", "true",
+    "false", "stone", "minecraft:stone", "[]", '["color":"red"]', "0 1",
+    '{"rawtext":[]}', "{", "x", "#", "=", "1L",
+)
+
+def keywords(rule, res: set):
+    # Add the options of every `Choice` in `rule` to `res`
+    if isinstance(rule, (list, tuple)):
+        for item in rule:
+            keywords(item, res)
+    elif isinstance(rule, Seq):
+        keywords(rule.items, res)
+    elif isinstance(rule, Choice):
+        res.update(rule.options)
+        keywords(tuple(rule.branches.values()), res)
+        keywords(rule.default, res)
+    elif isinstance(rule, If):
+        keywords((rule.then, rule.else_), res)
+    elif isinstance(rule, Versions):
+        keywords(tuple(rule.version2rule.values()), res)
+    return res
+
+def random_lines(per_command: int, seed: int = 0) -> str:
+    rnd = random.Random(seed)
+    lines = []
+    for command, rule in CommandTokenizer.GRAMMAR.items():
+        words = sorted(keywords(rule, set())) + list(VALUES)
+        for _ in range(per_command):
+            args = [rnd.choice(words) for _ in range(rnd.randint(0, 9))]
+            line = " ".join([command] + args)
+            if rnd.random() < 0.2:
+                line = line[:rnd.randint(0, len(line))]
+            lines.append(line)
+    return "\n".join(lines)
+
+def result(tokenizer) -> list:
+    return [
+        (token.type, token.begin, token.end, str(token.value))
+        for token in tokenizer.get_tokens()
+    ] + [
+        (token.begin, token.end, str(token))
+        for token in tokenizer.get_warnings()
+    ]
+
+def versions() -> list:
+    return sorted(CommandTokenizer.get_all_versions() | {MIN_VERSION})
+
+def check(src: str) -> int:
+    # Number of lines of `src` that differ in any version
+    differences = 0
+    for version in versions():
+        grammar = CommandTokenizer.specialize(version)
+        reference = ReferenceCommandTokenizer.specialize(version)
+        for line in src.split("\n"):
+            if result(grammar(line)) != result(reference(line)):
+                differences += 1
+                print("DIFFERENT %s: %r" % (
+                    ".".join(map(str, version)), line
+                ))
+    return differences
+
+def per_line_us(tokenizer_class, src: str, number = 3):
+    seconds = min(timeit.repeat(
+        lambda: tokenizer_class(src), number=number, repeat=3
+    ))
+    return seconds / number / (src.count("\n") + 1) * 1e6
+
+def main(per_command: int = 200):
+    src = random_lines(per_command)
+    differences = check(src)
+    for make in COMMAND_CORPORA.values():
+        differences += check(make(500, 0))
+    print("%d difference(s)" % differences)
+    print("%-24s %12s %12s" % ("", "methods(us)", "grammar(us)"))
+    for name, make in dict(COMMAND_CORPORA, random_lines=random_lines).items():
+        src = make(2000 if name != "random_lines" else 40, 0)
+        print("%-24s %12.2f %12.2f" % (
+            name, per_line_us(ReferenceCommandTokenizer, src),
+            per_line_us(CommandTokenizer, src)
+        ))
+    return differences
+
+if __name__ == "__main__":
+    sys.exit(1 if main(*map(int, sys.argv[1:])) else 0)
@@ -0,0 +1,105 @@
+# Check of the prefix lookups of `Keywords`
+# Compares `longest_prefix` and `completions` of every set of options the
+# tokenizer reads (and of the argument tables) with a plain scan of the
+# options, for the options themselves, their beginnings and random words.
+# Then checks that every "Invalid option" error in the corpora starts
+# where its word stops beginning like an option.
+# Usage: python benchmarks/check_options.py [random words per set]
+import os
+import sys
+import random
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mccmdhl.command import CommandTokenizer
+from mccmdhl.tokenizer_base import TokenType
+from mccmdhl.error import ErrorType, Keywords
+from mccmdhl.version_control import MIN_VERSION
+
+from corpora import COMMAND_CORPORA
+
+def _common_prefix(a: str, b: str) -> int:
+    length = 0
+    for x, y in zip(a, b):
+        if x != y:
+            break
+        length += 1
+    return length
+
+def keyword_sets() -> list:
+    # Every `Keywords` the tokenizer uses in any version
+    versions = sorted(CommandTokenizer.get_all_versions() | {MIN_VERSION})
+    for version in versions:
+        CommandTokenizer.command_table(version)
+        for schema in (
+            "SELECTOR_ARGUMENTS", "HASITEM_ARGUMENTS",
+            "HASPERMISSION_ARGUMENTS"
+        ):
+            Keywords.intern(tuple(
+                CommandTokenizer.argument_table(version, schema)
+            ))
+    return list(Keywords._interned.values())
+
+def words(options: Keywords, count: int, rnd: random.Random) -> list:
+    res = [""]
+    for option in options:
+        res.extend(option[:i] for i in range(len(option) + 1))
+        res.append(option + "x")
+        res.append(option[:-1] + "#")
+    alphabet = "".join(sorted(set("".join(options)))) or "a"
+    for _ in range(count):
+        res.append("".join(
+            rnd.choice(alphabet) for _ in range(rnd.randint(1, 8))
+        ))
+    return res
+
+def check_lookups(count: int) -> int:
+    differences = 0
+    rnd = random.Random(0)
+    for options in keyword_sets():
+        for word in words(options, count, rnd):
+            expected = max(
+                (_common_prefix(word, option) for option in options),
+                default=0
+            )
+            if options.longest_prefix(word) != expected:
+                print("longest_prefix(%r) of %r: %d, expecting %d" % (
+                    word, options, options.longest_prefix(word), expected
+                ))
+                differences += 1
+            expected = sorted(o for o in options if o.startswith(word))
+            if options.completions(word) != expected:
+                print("completions(%r) of %r: %r, expecting %r" % (
+                    word, options, options.completions(word), expected
+                ))
+                differences += 1
+    return differences
+
+def check_columns(src: str) -> int:
+    # Count the "Invalid option" errors of `src` in the wrong place
+    differences = 0
+    for token in CommandTokenizer(src).get_tokens():
+        if token.type is not TokenType.error \
+                or token.value.type is not ErrorType.INVALID_OPTION:
+            continue
+        option = token.value.error_kwargs["option"]
+        prefix = token.value.error_kwargs["correct"].longest_prefix(option)
+        if prefix == len(option):
+            prefix = 0 # nothing is wrong in the word itself
+        begin = token.begin - prefix
+        if src[begin:begin + len(option)] != option:
+            print("%s: %s, expecting the error at %d of %r" % (
+                token.pos_begin, token.value, prefix, option
+            ))
+            differences += 1
+    return differences
+
+def main(count: int = 200):
+    differences = check_lookups(count)
+    for make in COMMAND_CORPORA.values():
+        differences += check_columns(make(500, 0))
+    print("%d difference(s)" % differences)
+    return differences
+
+if __name__ == "__main__":
+    sys.exit(1 if main(*map(int, sys.argv[1:])) else 0)
@@ -0,0 +1,171 @@
+# Deterministic command corpora for the benchmarks
+# Every corpus is a function `(lines, seed) -> str` giving an mcfunction
+# source of `lines` lines; the same arguments always give the same text.
+import random
+
+__all__ = ["COMMAND_CORPORA", "JSON_CORPORA"]
+
+NAMES = ("alice", "bob", "lobby", "red", "blue", "game", "timer", "kills")
+BLOCKS = (
+    ("stone", '"stone_type":"granite"'),
+    ("wool", '"color":"lime"'),
+    ("log", '"old_log_type":"birch","pillar_axis":"y"'),
+    ("wheat", '"growth":7'),
+    ("lever", '"open_bit":true,"lever_direction":"north"'),
+)
+
+def _selector(rnd: random.Random, args: int = 3) -> str:
+    var = rnd.choice("aeprs")
+    choices = [
+        "tag=%s" % rnd.choice(NAMES),
+        "tag=!%s" % rnd.choice(NAMES),
+        "r=%d" % rnd.randint(1, 50),
+        "rm=%d" % rnd.randint(0, 5),
+        "c=%d" % rnd.randint(1, 10),
+        "name=%s" % rnd.choice(NAMES),
+        "type=minecraft:%s" % rnd.choice(("zombie", "cow", "player")),
+        "x=~%d" % rnd.randint(-9, 9),
+        "dx=%d" % rnd.randint(1, 9),
+        "l=%d" % rnd.randint(1, 30),
+        "m=%s" % rnd.choice(("s", "c", "a")),
+        "scores={%s=%d..%d}" % (
+            rnd.choice(NAMES), rnd.randint(0, 5), rnd.randint(6, 20)
+        ),
+        "family=!%s" % rnd.choice(("monster", "animal")),
+    ]
+    return "@%s[%s]" % (var, ",".join(rnd.sample(choices, args)))
+
+def _pos(rnd: random.Random) -> str:
+    return " ".join(
+        rnd.choice(("~", "~%d" % rnd.randint(-5, 5), str(rnd.randint(-99, 99))))
+        for _ in range(3)
+    )
+
+def execute_chains(lines: int, seed: int = 0) -> str:
+    # Selector heavy `execute` chains
+    rnd = random.Random(seed)
+    res = []
+    for _ in range(lines):
+        parts = ["execute"]
+        for _ in range(rnd.randint(2, 5)):
+            kind = rnd.randrange(4)
+            if kind == 0:
+                parts.append("as %s" % _selector(rnd, rnd.randint(1, 5)))
+            elif kind == 1:
+                parts.append("at %s" % _selector(rnd, rnd.randint(1, 3)))
+            elif kind == 2:
+                parts.append("positioned %s" % _pos(rnd))
+            else:
+                parts.append("if entity %s" % _selector(rnd))
+        parts.append("run tp @s %s" % _pos(rnd))
+        res.append(" ".join(parts))
+    return "\n".join(res)
+
+def long_selectors(lines: int, seed: int = 0) -> str:
+    # Commands whose selectors have 8 or more arguments
+    rnd = random.Random(seed)
+    res = []
+    for _ in range(lines):
+        selector = _selector(rnd, rnd.randint(8, 12))
+        res.append(rnd.choice((
+            "kill %s",
+            "execute as %s run say hi",
+            "tag %s add lobby",
+            "effect %s speed 10 1 true",
+        )) % selector)
+    return "\n".join(res)
+
+def _rawtext(rnd: random.Random, depth: int = 0) -> str:
+    parts = []
+    for _ in range(rnd.randint(1, 4)):
+        kind = rnd.randrange(4 if depth < 2 else 3)
+        if kind == 0:
+            parts.append('{"text":"%s %d"}' % (
+                rnd.choice(NAMES), rnd.randint(0, 999)
+            ))
+        elif kind == 1:
+            parts.append('{"selector":"%s"}' % _selector(rnd, 1))
+        elif kind == 2:
+            parts.append('{"score":{"name":"*","objective":"%s"}}'
+                         % rnd.choice(NAMES))
+        else:
+            parts.append('{"translate":"chat.%s","with":%s}' % (
+                rnd.choice(NAMES), _rawtext(rnd, depth + 1)
+            ))
+    return '{"rawtext":[%s]}' % ",".join(parts)
+
+def tellraw_json(lines: int, seed: int = 0) -> str:
+    # `tellraw` with JSON text
+    rnd = random.Random(seed)
+    return "\n".join(
+        "tellraw %s %s" % (_selector(rnd, 2), _rawtext(rnd))
+        for _ in range(lines)
+    )
+
+def scoreboard_operations(lines: int, seed: int = 0) -> str:
+    # `scoreboard players operation` spam
+    rnd = random.Random(seed)
+    ops = ("+=", "-=", "*=", "/=", "%=", "=", "<", ">", "><")
+    return "\n".join(
+        "scoreboard players operation %s %s %s %s %s" % (
+            rnd.choice(("@s", _selector(rnd, 2), rnd.choice(NAMES))),
+            rnd.choice(NAMES), rnd.choice(ops),
+            rnd.choice(("@s", _selector(rnd, 2), rnd.choice(NAMES))),
+            rnd.choice(NAMES)
+        )
+        for _ in range(lines)
+    )
+
+def fill_block_states(lines: int, seed: int = 0) -> str:
+    # `fill` with block states
+    rnd = random.Random(seed)
+    res = []
+    for _ in range(lines):
+        block, states = rnd.choice(BLOCKS)
+        line = "fill %s %s %s [%s]" % (_pos(rnd), _pos(rnd), block, states)
+        if rnd.random() < 0.5:
+            replace, replace_states = rnd.choice(BLOCKS)
+            line += " replace %s [%s]" % (replace, replace_states)
+        else:
+            line += " " + rnd.choice(("destroy", "hollow", "keep", "outline"))
+        res.append(line)
+    return "\n".join(res)
+
+def error_dense(lines: int, seed: int = 0) -> str:
+    # Lines with errors in them, made by damaging valid commands
+    rnd = random.Random(seed)
+    valid = (
+        execute_chains(lines, seed) + "\n" +
+        scoreboard_operations(lines, seed) + "\n" +
+        fill_block_states(lines, seed)
+    ).split("\n")
+    junk = ("[", "]", "{", "}", '"', "@", "~", "^", "=", ",", "x", "1.5", " ")
+    res = []
+    for line in rnd.sample(valid, lines):
+        chars = list(line)
+        for _ in range(rnd.randint(1, 4)):
+            i = rnd.randrange(len(chars))
+            if rnd.random() < 0.5:
+                chars[i] = rnd.choice(junk)
+            else:
+                del chars[i]
+        res.append("".join(chars))
+    return "\n".join(res)
+
+def json_texts(lines: int, seed: int = 0) -> str:
+    # Input of `JSONTokenizer`: one JSON array of rawtext objects, about
+    # as long as `lines` lines of `tellraw_json`
+    rnd = random.Random(seed)
+    return "[%s]" % ",".join(_rawtext(rnd) for _ in range(lines))
+
+COMMAND_CORPORA = {
+    "execute_chains": execute_chains,
+    "long_selectors": long_selectors,
+    "tellraw_json": tellraw_json,
+    "scoreboard_operations": scoreboard_operations,
+    "fill_block_states": fill_block_states,
+    "error_dense": error_dense,
+}
+JSON_CORPORA = {
+    "json_texts": json_texts,
+}
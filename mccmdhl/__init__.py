@@ -1,4 +1,11 @@
 from .command import *
-from .gui import *
+try:
+    from .gui import *
+except ImportError:
+    pass # No tkinter (e.g. on a server); the linter does not need it
 from .error import *
 from .tokenizer_base import *
+from .cache import *
+from .stream import *
+from .profiler import *
+from .multiversion import *
@@ -0,0 +1,6 @@
+# python -m mccmdhl: lint mcfunction files (see `mccmdhl.lint`)
+import sys
+
+from mccmdhl.lint import main
+
+sys.exit(main())
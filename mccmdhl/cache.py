@@ -0,0 +1,180 @@
+# Bounded caches used by the tokenizers and the linter
+import os
+import zlib
+import marshal
+import hashlib
+import tempfile
+from collections import OrderedDict
+
+__all__ = ["LRUCache", "DiskCache", "library_fingerprint"]
+
+class LRUCache:
+    # A mapping of at most `maxsize` entries; when full, the least recently
+    # used entry is dropped. Hits and misses of `get` are counted.
+    def __init__(self, maxsize: int = 4096) -> None:
+        self._data = OrderedDict()
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def maxsize(self) -> int:
+        return self._maxsize
+
+    @maxsize.setter
+    def maxsize(self, value: int):
+        # Shrinking the cache evicts the extra entries right away
+        if value < 1:
+            raise ValueError("maxsize must be positive")
+        self._maxsize = value
+        self._evict()
+
+    def _evict(self):
+        while len(self._data) > self._maxsize:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def get(self, key):
+        # Return the cached value or None
+        try:
+            value = self._data[key]
+        except KeyError:
+            self.misses += 1
+            return None
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key, value):
+        self._data[key] = value
+        self._data.move_to_end(key)
+        self._evict()
+
+    def clear(self):
+        # Drop all the entries and reset the statistics
+        self._data.clear()
+        self.hits = self.misses = self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def info(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "size": len(self._data),
+            "maxsize": self._maxsize,
+        }
+
+    def __repr__(self) -> str:
+        return "<LRUCache %(size)d/%(maxsize)d hits=%(hits)d " \
+            "misses=%(misses)d>" % self.info()
+
+_fingerprint = None
+
+def library_fingerprint() -> str:
+    # Hash of the source of this package, so that results cached by
+    # another version of the tokenizer are never used
+    global _fingerprint
+    if _fingerprint is None:
+        digest = hashlib.sha256()
+        package_dir = os.path.dirname(os.path.abspath(__file__))
+        for name in sorted(os.listdir(package_dir)):
+            if name.endswith(".py"):
+                digest.update(name.encode())
+                with open(os.path.join(package_dir, name), "rb") as file:
+                    digest.update(file.read())
+        _fingerprint = digest.hexdigest()
+    return _fingerprint
+
+class DiskCache:
+    # A persistent cache stored as one file per entry under `directory`,
+    # shared by processes and runs. Values are marshal-able objects (like
+    # tuples of strings), stored compressed. `trim` removes the least
+    # recently used entries until the total size is at most `max_bytes`.
+    SUFFIX = ".cache"
+
+    def __init__(self, directory: str, max_bytes: int = 256 * 1024 ** 2):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def key(content: bytes, *parts) -> str:
+        # Key of `content` processed with `parts` (like a version) by the
+        # current version of this package
+        digest = hashlib.sha256(content)
+        digest.update(repr(parts).encode())
+        digest.update(library_fingerprint().encode())
+        return digest.hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], key + self.SUFFIX)
+
+    def get(self, key: str):
+        # Return the cached value or None
+        path = self._path(key)
+        try:
+            with open(path, "rb") as file:
+                value = marshal.loads(zlib.decompress(file.read()))
+            os.utime(path) # mark as recently used
+        except (OSError, ValueError, EOFError, TypeError, zlib.error):
+            # Missing or broken (e.g. written by another Python version)
+            self.misses += 1
+            return None
+        self.hits += 1
+        return value
+
+    def put(self, key: str, value):
+        path = self._path(key)
+        data = zlib.compress(marshal.dumps(value))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write to a temporary file first so that other processes never
+        # read a partly written entry
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+        try:
+            with os.fdopen(fd, "wb") as file:
+                file.write(data)
+            os.replace(tmp_path, path)
+        except OSError:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+
+    def trim(self):
+        # Remove the least recently used entries until the total size is
+        # not larger than `max_bytes`
+        entries = []
+        total = 0
+        for root, dirs, files in os.walk(self.directory):
+            for name in files:
+                if not name.endswith(self.SUFFIX):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+                total += stat.st_size
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+
+    def __repr__(self) -> str:
+        return "<DiskCache %r hits=%d misses=%d>" % (
+            self.directory, self.hits, self.misses
+        )
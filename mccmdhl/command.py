@@ -1,22 +1,291 @@
 # The main command tokenizer
 
+import re
+import functools
+
 from mccmdhl.tokenizer_base import *
-from mccmdhl.json_helper import JSONTokenizer
+from mccmdhl.json_helper import JSONTokenizer, fast_json_tokens
 from mccmdhl.error import *
 from mccmdhl.version_control import *
+from mccmdhl.cache import LRUCache
+from mccmdhl.profiler import Profiler
+from mccmdhl.grammar import *
 
 __all__ = ["CommandTokenizer"]
 
+# Parts of the rules in `CommandTokenizer.GRAMMAR`
+_FULL_POS = "token_full_pos"
+_ID = "token_namespaced_id"
+_POS_OR_NAME = If("next_is_pos", _FULL_POS, "token_string")
+_ROTATIONS = ("token_rotation", "token_rotation")
+_RGB = (Arg("token_number", 0.0, 1.0),) * 3
+_CAMERA_POS_OR_ROT = {
+    "pos": (_FULL_POS, Opt(Choice(("rot",)), _ROTATIONS)),
+    "rot": _ROTATIONS,
+}
+_EASE_TYPES = ("linear", "spring") + tuple(
+    x + y for x in ("in_", "out_", "in_out_")
+    for y in ("back", "bounce", "circ", "cubic", "elastic",
+              "expo", "quad", "quart", "quint", "sine")
+)
+_CLONE_MODES = ("force", "move", "normal")
+_MUSIC_VOLUMN = Arg("token_number", 0, 1)
+_MUSIC_FADE = Arg("token_number", 0, 10)
+_MUSIC_TRACK = (
+    "token_string",
+    Chain(_MUSIC_VOLUMN, _MUSIC_FADE, Choice(("play_once", "loop")))
+)
+_WEATHER_DURATION = Opt(Arg("token_integer", 0, 1000000))
+
+# Options read by the methods of `CommandTokenizer`
+_DIFFICULTIES = Keywords.intern((
+    "easy", "normal", "hard", "peaceful", "p", "e", "n", "h"
+))
+_ANCHORS = Keywords.intern(("eyes", "feet"))
+_EXECUTE_SUBCOMMANDS = Keywords.intern((
+    "align", "anchored", "as", "at", "facing", "in", "positioned", "rotated",
+    "run", "if", "unless"
+))
+_ENTITY = Keywords.intern(("entity",))
+_AS = Keywords.intern(("as",))
+_EXECUTE_CONDITIONS = Keywords.intern(("block", "blocks", "entity", "score"))
+_BLOCKS_MODES = Keywords.intern(("all", "masked"))
+_MATCHES = Keywords.intern(("matches",))
+_DETECT = Keywords.intern(("detect",))
+_GAMEMODES = Keywords.intern((
+    "s", "c", "a", "d", "survival", "default", "creative", "adventure",
+    "spectator"
+))
+_LOOT_TARGETS = Keywords.intern(("spawn", "give", "insert", "replace"))
+_BLOCK_OR_ENTITY = Keywords.intern(("block", "entity"))
+_SLOT_CONTAINER = Keywords.intern(("slot.container",))
+_LOOT_SOURCES = Keywords.intern(("kill", "loot"))
+_SCOREBOARD_MODES = Keywords.intern(("objectives", "players"))
+_OBJECTIVES_MODES = Keywords.intern(("add", "list", "remove", "setdisplay"))
+_DUMMY = Keywords.intern(("dummy",))
+_DISPLAY_SLOTS = Keywords.intern(("list", "sidebar", "belowname"))
+_SORT_ORDERS = Keywords.intern(("ascending", "descending"))
+_PLAYERS_MODES = Keywords.intern((
+    "set", "add", "remove", "list", "operation", "random", "reset", "test"
+))
+_STRUCTURE_MODES = Keywords.intern(("save", "load", "delete"))
+_STRUCTURE_SAVE_MODES = Keywords.intern(("memory", "disk"))
+_ANIMATION_MODES = Keywords.intern(("block_by_block", "layer_by_layer"))
+_STRUCTURE_ROTATIONS = Keywords.intern((
+    "0_degrees", "90_degrees", "180_degrees", "270_degrees"
+))
+_MIRRORS = Keywords.intern(("none", "x", "z", "xz"))
+_FACING = Keywords.intern(("facing",))
+
+def _title(message) -> tuple:
+    # Rule of /title and /titleraw, where `message` reads the text
+    return ("token_target", Choice(
+        ("clear", "reset", "title", "subtitle", "actionbar", "times"),
+        {
+            "title": message, "subtitle": message, "actionbar": message,
+            "times": ("token_integer",) * 3
+        }
+    ))
+
 class CommandTokenizer(Tokenizer, VersionedMixin):
-    
+    # Test result in MCBE 1.19.30
+    TERMINATING_CHARS = ' ,@~^/$&"\'!#%+*=[{]}\\|<>`\n'
+    _TERMINATORS = frozenset(TERMINATING_CHARS + Tokenizer.EOF)
+    # Patterns matched at the cursor, each reading a whole lexeme at once
+    _WORD = re.compile("[^%s]*" % re.escape(TERMINATING_CHARS + Tokenizer.EOF))
+    # Guess of the text of a selector with arguments (see `token_target`)
+    _SELECTOR_TEXT = re.compile(
+        r"@[^%s]* *\[(?:[^\[\]\n]|\[[^\[\]\n]*\])*\] *[^ ]?"
+        % re.escape(TERMINATING_CHARS + Tokenizer.EOF)
+    )
+    _INTEGER = re.compile(r"[+-]?(\d*)")
+    _NUMBER = re.compile(r"[+-]?(\d*)(\.\d*)?")
+    _ID_CHARS = re.compile("[0-9a-z_.:-]*")
+    # What `float` accepts: Minecraft takes such words for numbers
+    _NUMLIKE = re.compile(r"""
+        [^\S\x1c-\x1f]* [+-]? (?:
+            (?:{d})? \. {d} (?:[eE] [+-]? {d})?
+          | {d} \.? (?:[eE] [+-]? {d})?
+          | [iI][nN][fF] (?:[iI][nN][iI][tT][yY])?
+          | [nN][aA][nN]
+        ) [^\S\x1c-\x1f]*
+    """.format(d=r"\d(?:_?\d)*"), re.VERBOSE)
+    ALIASES = {
+        "?": "help", "connect": "wsserver", "daylock": "alwaysday",
+        "msg": "tell", "w": "tell", "tp": "teleport",
+        "wb": "worldbuilder"
+    }
+    # Commands that function files can't execute
+    NO_PERMISSION_COMMANDS = frozenset((
+        "connect", "deop", "op", "setmaxplayers", "whitelist",
+        "save", "reload"
+    ))
+    _command_tables = {} # (class, version) -> result of `command_table`
+    # Arguments in selectors and in their `hasitem` and `haspermission`:
+    # name -> (name of the method reading the value, whether "!" can be
+    # put before the value, keyword arguments of the method like bounds of
+    # numbers, first version that has the argument)
+    SELECTOR_ARGUMENTS = {
+        "x": ("token_selector_pos", False, {}, MIN_VERSION),
+        "y": ("token_selector_pos", False, {}, MIN_VERSION),
+        "z": ("token_selector_pos", False, {}, MIN_VERSION),
+        "dx": ("token_number", False, {}, MIN_VERSION),
+        "dy": ("token_number", False, {}, MIN_VERSION),
+        "dz": ("token_number", False, {}, MIN_VERSION),
+        "r": ("token_number", False, {"check_min": 0}, MIN_VERSION),
+        "rm": ("token_number", False, {"check_min": 0}, MIN_VERSION),
+        "scores": ("token_selector_scores", False, {}, MIN_VERSION),
+        "tag": ("token_selector_tag", True, {}, MIN_VERSION),
+        "name": ("token_string", True, {}, MIN_VERSION),
+        "type": ("token_namespaced_id", True, {}, MIN_VERSION),
+        "family": ("token_string", True, {}, MIN_VERSION),
+        "rx": ("token_number", False, {}, MIN_VERSION),
+        "rxm": ("token_number", False, {}, MIN_VERSION),
+        "ry": ("token_number", False, {}, MIN_VERSION),
+        "rym": ("token_number", False, {}, MIN_VERSION),
+        "hasitem": ("token_hasitem", False, {}, MIN_VERSION),
+        "l": ("token_integer", False, {"check_min": 0}, MIN_VERSION),
+        "lm": ("token_integer", False, {"check_min": 0}, MIN_VERSION),
+        "m": ("token_gamemode_option", True, {}, MIN_VERSION),
+        "c": ("token_integer", False, {}, MIN_VERSION),
+        "haspermission": ("token_haspermission", False, {}, (1, 19, 80)),
+    }
+    HASITEM_ARGUMENTS = {
+        "item": ("token_namespaced_id", False, {}, MIN_VERSION),
+        # Yep, range of hasitem "data" is from -32768 to 32767,
+        # not -1 to 32767
+        "data": ("token_hasitem_data", False, {}, MIN_VERSION),
+        "quantity": ("token_number_range", False, {}, MIN_VERSION),
+        "location": ("token_word", False, {}, MIN_VERSION),
+        "slot": ("token_number_range", False, {}, MIN_VERSION),
+    }
+    HASPERMISSION_ARGUMENTS = {
+        "camera": ("token_state", False, {}, MIN_VERSION),
+        "movement": ("token_state", False, {}, MIN_VERSION),
+    }
+    # (class, version, name of the schema) -> result of `argument_table`
+    _argument_tables = {}
+    
+    DEFAULT_VERSION = (1, 19, 70)
+
     def __init__(
-        self, src: str, version=(1, 19, 70), lineno_start=1, col_start=0
+        self, src: str, version=None, lineno_start=1, col_start=0,
+        compact=False, line_cache: LRUCache = None, profiler: Profiler = None,
+        selector_cache: LRUCache = None
     ):
+        # version: defaults to the version of a `specialize`d class, or
+        # `DEFAULT_VERSION`
+        # compact: store the result in a `TokenBuffer` instead of a list,
+        # which takes much less memory when keeping lots of results
+        # line_cache: reuse the result of lines seen before (see `line`);
+        # the same cache can be shared by many tokenizers
+        # profiler: record the time spent in each command (see `Profiler`)
+        # selector_cache: like `line_cache`, but for selectors, which repeat
+        # much more often than whole lines (see `token_target`)
+        if version is None:
+            version = self.specialized_version or self.DEFAULT_VERSION
         super().__init__(src, lineno_start, col_start)
+        if compact:
+            self.tokens = TokenBuffer(self.lines)
+        self.line_cache = line_cache
+        self.selector_cache = selector_cache
         self.set_version(version)
+        self.profiler = profiler
+        if profiler is not None:
+            profiler.instrument(self)
         self.file()
     
+    def set_version(self, version: tuple):
+        super().set_version(version)
+        self.commands = self.command_table(version)
+        self.selector_args = self.argument_table(
+            version, "SELECTOR_ARGUMENTS"
+        )
+        self.hasitem_args = self.argument_table(version, "HASITEM_ARGUMENTS")
+        self.haspermission_args = self.argument_table(
+            version, "HASPERMISSION_ARGUMENTS"
+        )
+
+    @classmethod
+    def get_all_versions(cls) -> set:
+        res = super().get_all_versions()
+        for schema in (
+            cls.SELECTOR_ARGUMENTS, cls.HASITEM_ARGUMENTS,
+            cls.HASPERMISSION_ARGUMENTS
+        ):
+            res.update(entry[3] for entry in schema.values())
+        for rule in cls.GRAMMAR.values():
+            if isinstance(rule, Versions):
+                res.update(rule.versions)
+        return res
+    
+    @classmethod
+    def command_table(cls, version: tuple) -> dict:
+        # Map every command name and alias available in `version` to
+        # (command name, handler function, whether to warn NO_PERMISSION).
+        # The handlers of `GRAMMAR` rules run their compiled programs.
+        # Built once for each class and version and shared by instances.
+        table = cls._command_tables.get((cls, version))
+        if table is not None:
+            return table
+        table = {}
+        for attr in dir(cls):
+            if not attr.startswith("c_"):
+                continue
+            handler = getattr(cls, attr)
+            if isinstance(handler, VersionedMethod):
+                try:
+                    handler = handler.resolve(version)
+                except NotImplementedError:
+                    continue # Not available in this version
+            command = attr[2:]
+            table[command] = (
+                command, handler, command in cls.NO_PERMISSION_COMMANDS
+            )
+        for command, rule in cls.GRAMMAR.items():
+            if command in table:
+                continue # Written as a `c_` method
+            if isinstance(rule, Versions):
+                rule = rule.resolve(version)
+                if rule is None:
+                    continue # Not available in this version
+            table[command] = (
+                command,
+                functools.partial(run_program, program=compile_rule(rule)),
+                command in cls.NO_PERMISSION_COMMANDS
+            )
+        for alias, command in cls.ALIASES.items():
+            if command in table:
+                table[alias] = table[command]
+        cls._command_tables[(cls, version)] = table
+        return table
+
+    @classmethod
+    def argument_table(cls, version: tuple, schema: str) -> dict:
+        # Map the arguments of `cls.<schema>` (like `SELECTOR_ARGUMENTS`)
+        # available in `version` to (function reading the value, whether
+        # it can be negated), for `token_arguments`.
+        # Built once for each class, version and schema.
+        key = (cls, version, schema)
+        table = cls._argument_tables.get(key)
+        if table is not None:
+            return table
+        table = {}
+        for name, (method, negatable, kwargs, since) in \
+                getattr(cls, schema).items():
+            if version < since:
+                continue
+            reader = getattr(cls, method)
+            if isinstance(reader, VersionedMethod):
+                reader = reader.resolve(version)
+            if kwargs:
+                reader = functools.partial(reader, **kwargs)
+            table[name] = (reader, negatable)
+        cls._argument_tables[key] = table
+        return table
+    
     def get_tokens(self):
+        # a list of `Token`s, or a `TokenBuffer` when `compact` is set
         return self.tokens
     
     def get_warnings(self):
@@ -28,6 +297,59 @@ class CommandTokenizer(Tokenizer, VersionedMixin):
             self.line()
     
     def line(self):
+        # one line in mcfunction file, taken from `line_cache` if possible
+        # Entries are keyed by class, version and line content, and store
+        # token positions relative to the start of line.
+        cache = self.line_cache
+        if cache is None:
+            self.parse_line()
+            return
+        begin = self.cursor
+        end = self._LINE_REST.match(self.src, begin, self.src_end).end()
+        key = (type(self), self.version, self.src[begin:end])
+        entry = cache.get(key)
+        if entry is None:
+            token_count, warning_count = len(self.tokens), len(self.warnings)
+            self.parse_line()
+            cache.put(key, self.relative_result(
+                begin, token_count, warning_count
+            ))
+            return
+        self.add_relative_result(begin, entry)
+        self.jump_to(end)
+        self.forward() # skip \n or EOF
+
+    def relative_result(
+        self, begin: int, token_count: int, warning_count: int
+    ) -> tuple:
+        # The tokens and warnings after the first `token_count` tokens and
+        # `warning_count` warnings, with positions relative to `begin`, to
+        # be stored in a cache
+        return (
+            tuple(
+                (tok.type, tok.begin - begin, tok.end - begin, tok.value)
+                for tok in self.tokens[token_count:]
+            ),
+            tuple(
+                (tok.begin - begin, tok.end - begin,
+                 tok.warning_type, tok.warning_kwargs)
+                for tok in self.warnings[warning_count:]
+            )
+        )
+
+    def add_relative_result(self, begin: int, result: tuple):
+        # Add the tokens and warnings of a `relative_result` at `begin`
+        tokens, warnings = result
+        for type_, tok_begin, tok_end, value in tokens:
+            self.tokens.append(Token(
+                type_, begin + tok_begin, begin + tok_end, value, self.lines
+            ))
+        for tok_begin, tok_end, type_, kwargs in warnings:
+            self.warnings.append(WarningToken(
+                begin + tok_begin, begin + tok_end, self.lines, type_, **kwargs
+            ))
+
+    def parse_line(self):
         # one line in mcfunction file
         # could be comment, command, or empty line
         self.skip_spaces()
@@ -44,8 +366,7 @@ class CommandTokenizer(Tokenizer, VersionedMixin):
         return char == "-" or char == "+" or char.isdigit()
     
     def is_terminating_char(self, char: str):
-        # Test result in MCBE 1.19.30
-        return char in ' ,@~^/$&"\'!#%+*=[{]}\\|<>`\n' or char == self.EOF
+        return char in self._TERMINATORS
     
     def next_is_number(self):
         return self.is_number(self.current_char)
@@ -63,16 +384,15 @@ class CommandTokenizer(Tokenizer, VersionedMixin):
     def next_is_rotation(self):
         return self.next_is_number() or self.current_char == "~"
     
+    def word_end(self):
+        # Index of the first terminating char from current char
+        if self.cursor >= self.src_end:
+            return self.cursor
+        return self._WORD.match(self.src, self.cursor, self.src_end).end()
+    
     def peek_word(self):
         # Peek the next `word`, starting from current char
-        i = 0
-        chars = []
-        cur = self.current_char
-        while not self.is_terminating_char(cur):
-            chars.append(cur)
-            cur = self.peek(i)
-            i += 1
-        return "".join(chars)
+        return self.src[self.cursor:self.word_end()]
     
     def skip_space_until(self, rule):
         # What this does:
@@ -98,12 +418,18 @@ class CommandTokenizer(Tokenizer, VersionedMixin):
         return super().skip_line().rstrip()
     
     def expect(self, func, token: Token):
+        # Call `func` and return its result; if it fails, make `token` an
+        # error and return None. `func` can either raise an `Error` or,
+        # like the `scan_` readers, return it.
         try:
-            return func()
+            res = func()
         except Error as err:
+            res = err
+        if type(res) is Error:
             token.type = TokenType.error
-            token.value = err
+            token.value = res
             return None
+        return res
     
     def check_number(self, number: int, tok: Token, min: int, max: int = None):
         # check the range of number
@@ -117,12 +443,6 @@ class CommandTokenizer(Tokenizer, VersionedMixin):
             tok.type = TokenType.error
             tok.value = Error(ErrorType.NUMBER_OUT_OF_RANGE, min=min, max=max)
 
-    def argument_end(self):
-        if not self.next_is_terminating_char():
-            raise Error(ErrorType.EXP_TERMINATING_CHAR)
-        if self.current_char == " ":
-            self.skip_spaces() # multiple spaces are skipped
-
     # The following methods read different kinds of arguments.
     # After reading the expecting characters, they will expect a
     # "terminating character" like space, "@", "~", etc.
@@ -139,155 +459,158 @@ class CommandTokenizer(Tokenizer, VersionedMixin):
     # `argument_end`. However, we still want the spaces to be skipped,
     # so `skip_spaces` is called
 
-    def raw_word(self):
+    # Every reader is implemented as a `scan_` method, which returns the
+    # `Error` instead of raising it: raising and catching an exception
+    # costs much more than reading most arguments, and a line being typed
+    # is full of errors. `expect` accepts them as well as readers that
+    # raise.
+
+    def scan_argument_end(self):
+        if not self.next_is_terminating_char():
+            return Error(ErrorType.EXP_TERMINATING_CHAR)
+        if self.current_char == " ":
+            self.skip_spaces() # multiple spaces are skipped
+        return None
+
+    def scan_raw_word(self):
         # an unquoted string
-        res = ""
-        while not self.next_is_terminating_char():
-            res += self.current_char
-            self.forward()
+        end = self.word_end()
+        res = self.src[self.cursor:end]
+        self.jump_to(end)
         if not res:
-            raise Error(ErrorType.EXP_WORD)
+            return Error(ErrorType.EXP_WORD)
         # if an unquoted string looks like a number,
         # Minecraft thinks it is a number.
-        try:
-            float(res)
-        except ValueError:
-            pass
-        else:
-            raise Error(ErrorType.NUMLIKE_WORD)
+        if self._NUMLIKE.fullmatch(res) is not None:
+            return Error(ErrorType.NUMLIKE_WORD)
         return res
     
-    def raw_integer(self):
-        res = ""
-        if self.current_char == "-" or self.current_char == "+":
-            res += self.current_char
-            self.forward() # skip +/-
-        if not self.current_char.isdigit():
-            raise Error(ErrorType.EXP_INTEGER)
-        while self.current_char.isdigit():
-            res += self.current_char
-            self.forward()
-        num = int(res)
+    def scan_raw_integer(self):
+        match = self._INTEGER.match(self.src, self.cursor, self.src_end)
+        self.jump_to(match.end()) # after +/- if there is no digit
+        if not match.group(1):
+            return Error(ErrorType.EXP_INTEGER)
+        num = int(match.group())
         if not -2**31 <= num <= 2**31-1:
-            raise Error(ErrorType.INT_OVERFLOW)
+            return Error(ErrorType.INT_OVERFLOW)
         return num
     
-    def raw_number(self):
+    def scan_raw_number(self):
         # integer or floating number
-        res = ""
-        if self.current_char == "-" or self.current_char == "+":
-            res += self.current_char
-            self.forward() # skip +/-
-        if not self.current_char.isdigit():
-            raise Error(ErrorType.EXP_NUMBER)
-        while self.current_char.isdigit():
-            res += self.current_char
-            self.forward()
-        if self.current_char == ".":
-            self.forward() # skip "."
-            res += "."
-            if not self.current_char.isdigit():
-                raise Error(ErrorType.INCOMPLETE_FLOAT)
-            while self.current_char.isdigit():
-                res += self.current_char
-                self.forward()
-        return float(res)
-    
-    def raw_quoted_string(self):
+        match = self._NUMBER.match(self.src, self.cursor, self.src_end)
+        if not match.group(1):
+            self.jump_to(match.end(1)) # after +/-
+            return Error(ErrorType.EXP_NUMBER)
+        self.jump_to(match.end())
+        if match.group(2) == ".":
+            return Error(ErrorType.INCOMPLETE_FLOAT)
+        return float(match.group())
+    
+    def scan_raw_quoted_string(self):
         # a quoted string "xxx"
-        self.raw_char('"') # skip '"'
+        if self.current_char != '"':
+            return Error(ErrorType.EXP_CHAR, char='"')
+        self.forward() # skip '"'
         while self.current_char != '"':
             if not self.line_not_end():
-                raise Error(ErrorType.UNCLOSED_STRING)
+                return Error(ErrorType.UNCLOSED_STRING)
             next_two = self.current_char + self.peek()
             if next_two == "\\\\" or next_two == '\\"':
                 self.forward() # Forward 1 more time
             self.forward()
-        self.raw_char('"') # skip last '"'
+        self.forward() # skip last '"'
+        return None
 
-    def word(self):
-        res = self.raw_word()
-        self.argument_end()
-        return res
-    
-    def quoted_string(self):
-        res = self.raw_quoted_string()
+    def scan_word(self):
+        res = self.scan_raw_word()
+        if type(res) is Error:
+            return res
+        return self.scan_argument_end() or res
+    
+    def scan_quoted_string(self):
+        err = self.scan_raw_quoted_string()
+        if err is not None:
+            return err
         self.skip_spaces()
-        return res
+        return None
     
-    def string(self):
+    def scan_string(self):
         # word or quoted string
         if self.current_char == '"':
-            return self.quoted_string()
+            return self.scan_quoted_string()
         else:
-            return self.word()
+            return self.scan_word()
         # this does not need to call `argument_end`, since
         # both `quoted_string` and `word` handle this for us
     
-    def namespaced_id(self):
+    def scan_namespaced_id(self):
         # This name is from MinecraftWiki, representing item id, block id, etc.
         # See https://wiki.biligame.com/mc/命名空间ID
-        res = ""
-        while not self.next_is_terminating_char():
-            res += self.current_char
-            self.forward()
+        end = self.word_end()
+        res = self.src[self.cursor:end]
+        self.jump_to(end)
         if not res:
-            raise Error(ErrorType.EXP_ID)
-        if not all((
-            "0" <= char <= "9" or "a" <= char <= "z" or char in "_-.:"
-        ) for char in res):
-            raise Error(ErrorType.ILLEGAL_CHAR_IN_ID)
+            return Error(ErrorType.EXP_ID)
+        if self._ID_CHARS.fullmatch(res) is None:
+            return Error(ErrorType.ILLEGAL_CHAR_IN_ID)
         if res.count(":") > 1:
-            raise Error(ErrorType.MULTIPLE_COLONS_IN_ID)
+            return Error(ErrorType.MULTIPLE_COLONS_IN_ID)
         # if an unquoted namespace id looks like a number,
         # Minecraft thinks it is a number.
-        try:
-            float(res)
-        except ValueError:
-            pass
-        else:
-            raise Error(ErrorType.NUMLIKE_ID)
+        if self._NUMLIKE.fullmatch(res) is not None:
+            return Error(ErrorType.NUMLIKE_ID)
         self.skip_spaces()
         return res
     
-    def integer(self):
+    def scan_integer(self):
         # read an integer
-        res = self.raw_integer()
-        self.argument_end()
-        return res
-    
-    def number(self):
-        res = self.raw_number()
-        self.argument_end()
-        return res
-    
-    def number_range(self):
+        res = self.scan_raw_integer()
+        if type(res) is Error:
+            return res
+        return self.scan_argument_end() or res
+    
+    def scan_number(self):
+        res = self.scan_raw_number()
+        if type(res) is Error:
+            return res
+        return self.scan_argument_end() or res
+    
+    def scan_number_range(self):
         # a number range like "2", "-1..", "!3..+5"
         start, end = None, None
         if self.current_char == "!":
-            self.char("!")
+            self.forward()
+            self.skip_spaces()
         if self.next_is_number():
-            start = self.raw_integer()
+            start = self.scan_raw_integer()
+            if type(start) is Error:
+                return start
         using_dot = self.skip_space_until(lambda c: c == ".")
         if using_dot:
             self.forward() # skip one "."
-            self.raw_char(".") # expect another "."
+            if self.current_char != ".": # expect another "."
+                return Error(ErrorType.EXP_CHAR, char=".")
+            self.forward()
             using_end = self.skip_space_until(self.is_number)
             if using_end:
-                end = self.raw_integer()
+                end = self.scan_raw_integer()
+                if type(end) is Error:
+                    return end
         if start is None and end is None:
-            raise Error(ErrorType.EXP_INT_RANGE)
+            return Error(ErrorType.EXP_INT_RANGE)
         if (start is not None) and (end is not None) and (start > end):
-            raise Error(ErrorType.IMPOSSIBLE_RANGE)
-        self.argument_end()
+            return Error(ErrorType.IMPOSSIBLE_RANGE)
+        return self.scan_argument_end()
 
-    def boolean(self):
-        word = self.raw_word()
+    def scan_boolean(self):
+        word = self.scan_raw_word()
+        if type(word) is Error:
+            return word
         if word not in ("true", "false"):
-            raise Error(ErrorType.EXP_BOOL)
-        self.argument_end()
+            return Error(ErrorType.EXP_BOOL)
+        return self.scan_argument_end()
     
-    def pos(self):
+    def scan_pos(self):
         # one dimension of postion
         # e.g. "-3.1", "~2", "^"
         if self.current_char == "~":
@@ -301,14 +624,17 @@ class CommandTokenizer(Tokenizer, VersionedMixin):
         if res in ("relative", "local"):
             # number is not a must when "~" or "^" exist
             if self.next_is_number():
-                self.raw_number()
+                err = self.scan_raw_number()
+                if type(err) is Error:
+                    return err
         else: # number is a must when using absolute pos
             if not self.next_is_number():
-                raise Error(ErrorType.EXP_POS)
-            self.raw_number()
-        self.argument_end()
-        return res
-    
+                return Error(ErrorType.EXP_POS)
+            err = self.scan_raw_number()
+            if type(err) is Error:
+                return err
+        return self.scan_argument_end() or res
+
     # The following method create tokens
 
     def token_command(self):
@@ -316,39 +642,26 @@ class CommandTokenizer(Tokenizer, VersionedMixin):
         ## read command name
         with self.create_token(TokenType.command) as tok:
             # Get the command
-            command = self.expect(self.word, tok)
+            command = self.expect(self.scan_word, tok)
             if command is None:
                 tok.type = TokenType.error
                 tok.value = Error(ErrorType.EXP_COMMAND)
                 self.skip_line()
                 return
-            ALIAS = {
-                "?": "help", "connect": "wsserver", "daylock": "alwaysday",
-                "msg": "tell", "w": "tell", "tp": "teleport",
-                "wb": "worldbuilder"
-            }
             raw_command = command
-            command = ALIAS.get(command, command)
-            # Parse arguments
-            try:
-                command_method = getattr(self, "c_%s" % command, None)
-            except NotImplementedError:
-                # Can be raised by version control system
-                command_method = None
-            if command_method is None:
+            entry = self.commands.get(command)
+            if entry is None:
                 tok.type = TokenType.error
                 tok.value = Error(ErrorType.UNKNOWN_COMMAND, command=command)
                 self.skip_line()
                 return
+            command, handler, no_permission = entry
             tok.value = command
         ## check if function can executes this command
-        if command in (
-            "connect", "deop", "op", "setmaxplayers", "whitelist",
-            "save", "reload"
-        ):
+        if no_permission:
             self.warn_at(tok, WarningType.NO_PERMISSION, command=raw_command)
         ## read argument of command
-        command_method()
+        handler(self)
         ## line should end here
         if self.line_not_end():
             with self.create_token(
@@ -361,150 +674,158 @@ class CommandTokenizer(Tokenizer, VersionedMixin):
             self.forward() # skip "#"
             self.skip_line()
 
-    _selector_args = VersionedMethod()
-
-    @_selector_args.variation(version=MIN_VERSION)
-    def _selector_args_oldest(self):
-        return (
-            "x", "y", "z", "dx", "dy", "dz", "r", "rm",
-            "scores", "tag", "name", "type", "family", "rx",
-            "rxm", "ry", "rym", "hasitem", "l", "lm", "m", "c"
-        )
-
-    @_selector_args.variation(version=(1, 19, 80))
-    def _selector_args_1_19_80(self):
-        return self._selector_args_oldest() + ("haspermission",)
-
     def token_target(self):
-        # selector or player name
-        def _handle_scores():
-            # just to decrease indentation :)
-            for _ in self.token_list("{", "}", allow_empty=False):
-                with self.create_token(TokenType.scoreboard) as tok:
-                    # NOTE scores allow quoted string as key!!!
-                    # e.g. @a[scores={"xxx"=1}]
-                    self.expect(self.string, tok)
-                self.expect_char("=")
-                with self.create_token(TokenType.number) as tok:
-                    self.expect(self.number_range, tok)
-    
-        def _hasitem_component():
-            # just to decrease indentation :)
-            # One object quoted by {} in hasitem
-            args = []
-            for _ in self.token_list("{", "}", allow_empty=False):
-                arg = self.token_options(
-                    "item", "data", "quantity", "location", "slot"
-                )
-                args.append(arg)
-                self.expect_char("=")
-                if arg == "item":
-                    self.token_namespaced_id()
-                elif arg == "data":
-                    # Yep, range of hasitem "data" is from -32768 to 32767,
-                    # not -1 to 32767
-                    with self.create_token(TokenType.number) as tok:
-                        value = self.expect(self.integer, tok)
-                    if value and value < 0:
-                        self.warn_at(tok, WarningType.DANGEROUS_HASITEM_DATA)
-                elif arg in ("quantity", "slot"):
-                    with self.create_token(TokenType.number) as tok:
-                        self.expect(self.number_range, tok)
-                elif arg == "location":
-                    with self.create_token(TokenType.string) as tok:
-                        self.expect(self.word, tok)
-            if "item" not in args:
-                with self.create_token(
-                    TokenType.error, Error(ErrorType.HASITEM_MISSING_ITEM)
-                ): pass
-        
-        def _handle_hasitem():
-            if self.current_char == "[":
-                for _ in self.token_list("[", "]", allow_empty=False):
-                    _hasitem_component()
-            else:
-                _hasitem_component()
-
-        def _handle_haspermission():
-            for _ in self.token_list("{", "}", allow_empty=False):
-                self.token_permission()
-                self.expect_char("=")
-                self.token_state()
+        # selector or player name, a selector with arguments is taken
+        # from `selector_cache` if possible (others are quick to parse)
+        cache = self.selector_cache
+        if cache is None or self.current_char != "@":
+            self.parse_target()
+            return
+        # Entries are keyed by class, version and the text read by
+        # `parse_target` (with the char after it, which it also looks at),
+        # so a cache can be shared by subclasses that read selectors in
+        # their own way. Before parsing that text is unknown, so
+        # `_SELECTOR_TEXT` guesses it; selectors where the guess is wrong
+        # are just not cached.
+        begin = self.cursor
+        guess = self._SELECTOR_TEXT.match(self.src, begin, self.src_end)
+        if guess is None:
+            self.parse_target()
+            return
+        key = (type(self), self.version, guess.group())
+        entry = cache.get(key)
+        if entry is None:
+            token_count, warning_count = len(self.tokens), len(self.warnings)
+            self.parse_target()
+            end = self.cursor
+            # At the end of source `parse_target` has seen an EOF, which is
+            # never in a guess
+            if end < self.src_end and self.src[begin:end + 1] == key[2]:
+                cache.put(key, (
+                    end - begin,
+                    self.relative_result(begin, token_count, warning_count)
+                ))
+            return
+        length, result = entry
+        self.add_relative_result(begin, result)
+        self.jump_to(begin + length)
 
+    def parse_target(self):
+        # selector or player name
         if self.current_char != "@":
             # a name
             with self.create_token(TokenType.selector) as tok:
-                self.expect(self.string, tok)
+                self.expect(self.scan_string, tok)
         else:
             # a selector
             with self.create_token(TokenType.selector) as tok:
                 self.forward() # skip "@"
-                var = self.expect(self.word, tok) # xxx in @xxx
+                var = self.expect(self.scan_word, tok) # xxx in @xxx
                 if (var is not None) and var not in (
                     "a", "e", "r", "s", "p", "c", "v", "initiator"
                 ):
                     tok.type = TokenType.error
                     tok.value = Error(ErrorType.INVALID_SELECTOR_TYPE, var=var)
             if self.current_char == "[":
-                for _ in self.token_list("[", "]", allow_empty=False):
                 # We have tested that `@e[]` is not a valid selector
-                    arg = self.token_options(*self._selector_args())
-                    self.expect_char("=")
-                    if arg in ("r", "rm"):
-                        self.token_number(check_min=0)
-                    if arg in (
-                        "dx", "dy", "dz", "rx", "rxm", "ry", "rym"
-                    ):
-                        self.token_number()
-                    elif arg == "c":
-                        self.token_integer()
-                    elif arg in ("l", "lm"):
-                        self.token_integer(check_min=0)
-                    elif arg in ("name", "family"):
-                        if self.current_char == "!":
-                            self.char("!") # skip "!" if exists
-                        self.token_string()
-                    elif arg == "type":
-                        if self.current_char == "!":
-                            self.char("!")
-                        self.token_namespaced_id()
-                    elif arg in ("x", "y", "z"):
-                        with self.create_token(TokenType.pos) as tok:
-                            kind = self.expect(self.pos, tok)
-                            if kind == "local":
-                                tok.type = TokenType.error
-                                tok.value = Error(
-                                    ErrorType.LOCAL_POS_FOR_SELECTOR
-                                )
-                    elif arg == "scores":
-                        _handle_scores()
-                    elif arg == "tag":
-                        if self.current_char == "!":
-                            self.char("!") # skip "!" if exists
-                        # NOTE tag accepts empty argument like "@a[tag=]"
-                        if not self.next_is_terminating_char() or \
-                            self.current_char == '"':
-                            with self.create_token(TokenType.tag) as tok:
-                                self.expect(self.string, tok)
-                    elif arg == "hasitem":
-                        _handle_hasitem()
-                    elif arg == "m":
-                        if self.current_char == "!":
-                            self.char("!")
-                        self.token_gamemode_option()
-                    elif arg == "haspermission":
-                        _handle_haspermission()
+                self.token_arguments(self.selector_args, "[", "]")
         self.skip_spaces()
+
+    def token_arguments(
+        self, table: dict, start = "{", end = "}", read_invalid = None
+    ) -> list:
+        # A list of `name=value` like the one of a selector, with the
+        # arguments in `table` (see `argument_table`)
+        # read_invalid: function reading the value of an invalid argument;
+        # by default the value is not read
+        # Return the names of the arguments, None for invalid ones
+        names = []
+        for _ in self.token_list(start, end, allow_empty=False):
+            name = self.token_options_in(table)
+            names.append(name)
+            self.expect_char("=")
+            if name is not None:
+                reader, negatable = table[name]
+                if negatable and self.current_char == "!":
+                    self.char("!") # skip "!" if exists
+                reader(self)
+            elif read_invalid is not None:
+                read_invalid(self)
+        return names
+
+    # Values of selector arguments
+
+    def token_selector_pos(self):
+        with self.create_token(TokenType.pos) as tok:
+            kind = self.expect(self.scan_pos, tok)
+            if kind == "local":
+                tok.type = TokenType.error
+                tok.value = Error(ErrorType.LOCAL_POS_FOR_SELECTOR)
+
+    def token_selector_scores(self):
+        for _ in self.token_list("{", "}", allow_empty=False):
+            with self.create_token(TokenType.scoreboard) as tok:
+                # NOTE scores allow quoted string as key!!!
+                # e.g. @a[scores={"xxx"=1}]
+                self.expect(self.scan_string, tok)
+            self.expect_char("=")
+            self.token_number_range()
+
+    def token_selector_tag(self):
+        # NOTE tag accepts empty argument like "@a[tag=]"
+        if not self.next_is_terminating_char() or self.current_char == '"':
+            with self.create_token(TokenType.tag) as tok:
+                self.expect(self.scan_string, tok)
+
+    def token_hasitem(self):
+        if self.current_char == "[":
+            for _ in self.token_list("[", "]", allow_empty=False):
+                self.token_hasitem_component()
+        else:
+            self.token_hasitem_component()
+
+    def token_hasitem_component(self):
+        # One object quoted by {} in hasitem
+        if "item" not in self.token_arguments(self.hasitem_args):
+            with self.create_token(
+                TokenType.error, Error(ErrorType.HASITEM_MISSING_ITEM)
+            ): pass
+
+    def token_hasitem_data(self):
+        with self.create_token(TokenType.number) as tok:
+            value = self.expect(self.scan_integer, tok)
+        if value and value < 0:
+            self.warn_at(tok, WarningType.DANGEROUS_HASITEM_DATA)
+
+    def token_haspermission(self):
+        # Every permission has a state, even if it is invalid
+        self.token_arguments(
+            self.haspermission_args, read_invalid=type(self).token_state
+        )
     
     def token_options(self, *options):
         # choose between `options`
+        # The methods here pass constant `Keywords` to `token_options_in`
+        # instead, which saves interning `options` on every call.
+        return self.token_options_in(Keywords.intern(options))
+
+    def token_options_in(self, options):
+        # Like `token_options`, but `options` is a collection of them,
+        # usually `Keywords` (or the keys of a dict)
+        # The "correct" argument of the error is always `Keywords`, so
+        # it is formatted like `OptionList`. When the word begins like an
+        # option, the error starts where it goes wrong.
         with self.create_token(TokenType.option) as tok:
-            option = self.expect(self.word, tok)
+            option = self.expect(self.scan_word, tok)
             if option is not None and option not in options:
+                if type(options) is not Keywords:
+                    options = Keywords.intern(tuple(options))
+                prefix = options.longest_prefix(option)
+                if prefix < len(option):
+                    tok.begin += prefix
                 tok.type = TokenType.error
                 tok.value = Error(
-                    ErrorType.INVALID_OPTION, option=option,
-                    correct = ", ".join(repr(opt) for opt in options)
+                    ErrorType.INVALID_OPTION, option=option, correct=options
                 )
                 return None
         return option
@@ -512,11 +833,15 @@ class CommandTokenizer(Tokenizer, VersionedMixin):
     def token_json(self, expect = "any"):
         # a JSON object
         # NOTE this would consump all the chars left in current line
-        start_lineno, start_col = self.current_lineno, self.current_col
-        json = self.skip_line()
-        tokens = JSONTokenizer(json, start_lineno, start_col).get_tokens(
-            expect = expect
-        )
+        # Valid JSON is read by `fast_json_tokens`; `JSONTokenizer`, which
+        # is much slower, is only used to find the errors
+        begin = self.cursor
+        end = begin + len(self.skip_line())
+        tokens = fast_json_tokens(self.src, begin, end, self.lines, expect)
+        if tokens is None:
+            tokens = JSONTokenizer(
+                self.src, begin=begin, end=end, lines=self.lines
+            ).get_tokens(expect = expect)
         self.tokens.extend(tokens)
     
     def token_blockstate(self):
@@ -524,16 +849,16 @@ class CommandTokenizer(Tokenizer, VersionedMixin):
         # only boolean, string, integer is allowed as value
         for _ in self.token_list("[", "]", allow_empty=True):
             with self.create_token(TokenType.option) as tok:
-                self.expect(self.quoted_string, tok)
+                self.expect(self.scan_quoted_string, tok)
             self.expect_char(":")
             if self.current_char == '"':
                 with self.create_token(TokenType.string) as tok:
-                    self.expect(self.quoted_string, tok)
+                    self.expect(self.scan_quoted_string, tok)
             elif self.next_is_number():
                 self.token_integer()
             else: # try boolean
                 with self.create_token() as tok:
-                    word = self.expect(self.word, tok)
+                    word = self.expect(self.scan_word, tok)
                     if word in ("true", "false"):
                         tok.type = TokenType.boolean
                     else:
@@ -570,9 +895,9 @@ class CommandTokenizer(Tokenizer, VersionedMixin):
             if self.current_char == "~":
                 self.forward()
                 if self.next_is_number():
-                    self.expect(self.number, tok)
+                    self.expect(self.scan_number, tok)
             else:
-                self.expect(self.number, tok)
+                self.expect(self.scan_number, tok)
         self.skip_spaces()
     
     def token_full_pos(self, dimension = 3):
@@ -580,37 +905,49 @@ class CommandTokenizer(Tokenizer, VersionedMixin):
         kinds = []
         for _ in range(dimension):
             with self.create_token(TokenType.pos) as tok:
-                kinds.append(self.expect(self.pos, tok))
-            if "relative" in kinds and "local" in kinds:
-                tok.type = TokenType.error
-                tok.value = Error(ErrorType.LOCAL_POS_WITH_RELATIVE)
+                kinds.append(self.expect(self.scan_pos, tok))
+                if "relative" in kinds and "local" in kinds:
+                    tok.type = TokenType.error
+                    tok.value = Error(ErrorType.LOCAL_POS_WITH_RELATIVE)
     
     def token_namespaced_id(self):
         with self.create_token(TokenType.string) as tok:
-            self.expect(self.namespaced_id, tok)
+            self.expect(self.scan_namespaced_id, tok)
     
     def token_string(self):
         with self.create_token(TokenType.string) as tok:
-            self.expect(self.string, tok)
+            self.expect(self.scan_string, tok)
+    
+    def token_word(self):
+        with self.create_token(TokenType.string) as tok:
+            self.expect(self.scan_word, tok)
+
+    def token_number_range(self):
+        with self.create_token(TokenType.number) as tok:
+            self.expect(self.scan_number_range, tok)
     
     def token_boolean(self):
         with self.create_token(TokenType.boolean) as tok:
-            self.expect(self.boolean, tok)
+            self.expect(self.scan_boolean, tok)
     
     def token_scoreboard(self):
         with self.create_token(TokenType.scoreboard) as tok:
-            self.expect(self.string, tok)
+            self.expect(self.scan_string, tok)
+
+    def token_tag(self):
+        with self.create_token(TokenType.tag) as tok:
+            self.expect(self.scan_string, tok)
     
     def token_integer(self, check_min: int = None, check_max: int = None):
         with self.create_token(TokenType.number) as tok:
-            value = self.expect(self.integer, tok)
+            value = self.expect(self.scan_integer, tok)
             if check_min is not None:
                 self.check_number(value, tok, check_min, check_max)
         return value
     
     def token_number(self, check_min: int = None, check_max: int = None):
         with self.create_token(TokenType.number) as tok:
-            value = self.expect(self.number, tok)
+            value = self.expect(self.scan_number, tok)
             if check_min is not None:
                 self.check_number(value, tok, check_min, check_max)
         return value
@@ -629,19 +966,22 @@ class CommandTokenizer(Tokenizer, VersionedMixin):
         # return True if true or false is used,
         # return False if `options` are used
         # return None if error
+        return self.token_bool_or_options_in(Keywords.intern(options))
+
+    def token_bool_or_options_in(self, options: Keywords):
+        # Like `token_bool_or_options`, but `options` is a `Keywords`
         with self.create_token() as tok:
-            word = self.expect(self.word, tok)
-            if word in ("true", "false"):
+            word = self.expect(self.scan_word, tok)
+            if word == "true" or word == "false":
                 tok.type = TokenType.boolean
                 return True
-            elif word in options:
+            if word in options:
                 tok.type = TokenType.option
                 return False
             else:
                 tok.type = TokenType.error
                 tok.value = Error(
-                    ErrorType.EXP_BOOL_OR_OPTION,
-                    options=", ".join(repr(opt) for opt in options)
+                    ErrorType.EXP_BOOL_OR_OPTION, options=options
                 )
                 return None
     
@@ -660,143 +1000,228 @@ class CommandTokenizer(Tokenizer, VersionedMixin):
                 break
     
     # Following are the definitions of commands
-    
-    def c_ability(self):
-        self.token_target()
-        self.token_chained_arguments(
-            lambda: self.token_options("worldbuilder", "mayfly", "mute"),
-            self.token_boolean
-        )
-    
-    def c_alwaysday(self):
-        if self.line_not_end():
-            self.token_boolean()
-   
-    @versioned_method(version=(1, 20, 0))
-    def c_camera(self):
-        self.token_target() # players
-        mode = self.token_options("clear", "fade", "set")
-        if mode == "fade":
-            def _color():
-                for _ in range(3): # RGB
-                    self.token_number(0.0, 1.0)
-            if self.line_not_end():
-                fade_opt = self.token_options("time", "color")
-                if fade_opt == "time":
-                    for _ in range(3): # fadeIn, hold, fadeOut
-                        self.token_number()
-                    if self.line_not_end():
-                        self.token_options("color")
-                        _color()
-                elif fade_opt == "color":
-                    _color()
-        elif mode == "set":
-            self.token_string() # preset
-            set_opt = None
-            if self.line_not_end():
-                set_opt = self.token_options("ease", "pos", "rot", "default")
-                if set_opt == "ease":
-                    set_opt = None
-                    self.token_number() # easeTime
-                    # easeType
-                    EASE_TYPES = ["linear", "spring"]
-                    for x in ("in_", "out_", "in_out_"):
-                        for y in ("back", "bounce", "circ", "cubic", "elastic",
-                                  "expo", "quad", "quart", "quint", "sine"):
-                            EASE_TYPES.append(x + y)
-                    self.token_options(*EASE_TYPES)
-                    if self.line_not_end():
-                        set_opt = self.token_options("pos", "rot", "default")
-            def _rot():
-                self.token_rotation()
-                self.token_rotation()
-            if set_opt == "pos":
-                self.token_full_pos()
-                if self.line_not_end():
-                    self.token_options("rot")
-                    _rot()
-            elif set_opt == "rot":
-                _rot()
+    # Most are rules in `GRAMMAR` (see `mccmdhl.grammar`); `c_` methods
+    # are used for the others and take precedence over the rules.
 
-    def c_camerashake(self):
-        mode = self.token_options("add", "stop")
-        if mode == "add":
-            self.token_target()
-            self.token_chained_arguments(
-                lambda: self.token_number(0, 4), # intensity
-                self.token_number, # seconds
-                lambda: self.token_options("positional", "rotational")
+    GRAMMAR = {
+        "ability": ("token_target", Chain(
+            Choice(("worldbuilder", "mayfly", "mute")), "token_boolean"
+        )),
+        "alwaysday": Opt("token_boolean"),
+        "camera": Versions({(1, 20, 0): ("token_target", Choice(
+            ("clear", "fade", "set"),
+            {
+                "fade": Opt(Choice(("time", "color"), {
+                    # fadeIn, hold, fadeOut
+                    "time": (("token_number",) * 3, Opt(
+                        Choice(("color",)), _RGB
+                    )),
+                    "color": _RGB,
+                })),
+                "set": ("token_string", Opt(Choice( # preset
+                    ("ease", "pos", "rot", "default"),
+                    dict(_CAMERA_POS_OR_ROT, ease=(
+                        "token_number", # easeTime
+                        Choice(_EASE_TYPES),
+                        Opt(Choice(
+                            ("pos", "rot", "default"), _CAMERA_POS_OR_ROT
+                        ))
+                    ))
+                ))),
+            }
+        ))}),
+        "camerashake": Choice(("add", "stop"), {
+            "add": ("token_target", Chain(
+                Arg("token_number", 0, 4), # intensity
+                "token_number", # seconds
+                Choice(("positional", "rotational"))
+            )),
+            "stop": Opt("token_target"),
+        }),
+        "clear": Chain(
+            "token_target", _ID,
+            Arg("token_integer", -1), # data
+            Arg("token_integer", -1) # max count
+        ),
+        "clearspawnpoint": Opt("token_target"),
+        "clone": (_FULL_POS,) * 3 + (Opt(Choice(
+            ("masked", "replace", "filtered"),
+            {"filtered": (Choice(_CLONE_MODES), _ID, "token_bs_or_data")},
+            Opt(Choice(_CLONE_MODES))
+        )),),
+        "damage": (
+            "token_target",
+            Arg("token_integer", 0), # amount
+            Opt("token_word", Opt( # damage cause
+                Choice(("entity",)), "token_target"
+            ))
+        ),
+        "deop": "token_target",
+        "dialogue": Choice(("change", "open"), {
+            # npc, sceneName, players
+            "change": ("token_target", "token_string", Opt("token_target")),
+            # npc, player, sceneName
+            "open": ("token_target", "token_target", Opt("token_string")),
+        }, "token_target"),
+        "event": (Choice(("entity",)), "token_target", "token_string"),
+        "fill": (_FULL_POS, _FULL_POS, _ID, Opt("token_bs_or_data", Opt(
+            Choice(
+                ("destroy", "hollow", "keep", "outline", "replace"),
+                {"replace": Opt(_ID, Opt("token_bs_or_data"))}
             )
-        elif mode == "stop":
-            if self.line_not_end():
-                self.token_target()
-    
-    def c_clear(self):
-        self.token_chained_arguments(
-            self.token_target,
-            self.token_namespaced_id, # item id
-            lambda: self.token_integer(check_min=-1), # data
-            lambda: self.token_integer(check_min=-1) # max count
-        )
-    
-    def c_clearspawnpoint(self):
-        if self.line_not_end():
-            self.token_target()
-    
-    def c_clone(self):
-        CLONEMODES = ("force", "move", "normal")
-        for _ in range(3):
-            self.token_full_pos()
-        if self.line_not_end():
-            maskmode = self.token_options("masked", "replace", "filtered")
-            if maskmode == "filtered":
-                self.token_options(*CLONEMODES)
-                self.token_namespaced_id()
-                self.token_bs_or_data()
-            else:
-                if self.line_not_end():
-                    self.token_options(*CLONEMODES)
-    
-    def c_damage(self):
-        self.token_target()
-        self.token_integer(check_min=0) # amount
-        if self.line_not_end():
-            with self.create_token(TokenType.string) as tok:
-                self.expect(self.word, tok) # damage cause
-            if self.line_not_end():
-                self.token_options("entity")
-                self.token_target()
-    
-    def c_deop(self):
-        self.token_target()
-    
-    def c_dialogue(self):
-        mode = self.token_options("change", "open")
-        self.token_target() # npc
-        if mode == "change":
-            self.token_string() # sceneName
-            if self.line_not_end():
-                self.token_target() # players
-        elif mode == "open":
-            self.token_target() # player
-            if self.line_not_end():
-                self.token_string() # sceneName
-    
+        ))),
+        "fog": (
+            "token_target",
+            Choice(("push", "pop", "remove"), {"push": _ID}), # Fog id
+            "token_string" # userProvidedID
+        ),
+        "function": Arg(
+            "token_skip_line", ErrorType.EXP_FUNCTION_PATH, True
+        ),
+        "gamemode": ("token_gamemode_option", Opt("token_target")),
+        "give": ("token_target", _ID, Chain(
+            Arg("token_integer", 1, 32767), # amount
+            Arg("token_integer", 0, 32767), # data
+            Arg("token_json", "object") # component
+        )),
+        "immutableworld": Opt("token_boolean"),
+        # In query mode, state is optional and in set mode its required
+        "inputpermission": Versions({(1, 19, 80): Choice(
+            ("query", "set"),
+            {"set": ("token_target", "token_permission", "token_state")},
+            ("token_target", "token_permission", Opt("token_state"))
+        )}),
+        "kick": ("token_target", "skip_line"), # reason (optional)
+        "kill": Opt("token_target"),
+        "list": (),
+        "locate": Choice(("biome", "structure"), {
+            "biome": _ID,
+            "structure": (_ID, Opt("token_boolean")),
+        }),
+        "me": "token_skip_line",
+        "mobevent": (_ID, Opt("token_boolean")),
+        "tell": ("token_target", "token_skip_line"),
+        "music": Choice(("play", "queue", "stop", "volumn"), {
+            "play": _MUSIC_TRACK,
+            "queue": _MUSIC_TRACK,
+            "stop": Opt(_MUSIC_FADE),
+            "volumn": _MUSIC_VOLUMN,
+        }),
+        "op": "token_target",
+        "particle": (_ID, Opt(_FULL_POS)),
+        "playanimation": ("token_target", "token_string", Chain(
+            "token_string", # next state
+            "token_number", # blend out time
+            "token_string", # stop expression
+            "token_string" # controller
+        )),
+        "playsound": ("token_string", Chain(
+            "token_target", _FULL_POS,
+            Arg("token_number", 0), # volumn
+            Arg("token_number", 0, 256), # pitch
+            Arg("token_number", 0) # min volumn
+        )),
+        "reload": (),
+        "ride": ("token_target", Choice(
+            (
+                "start_riding", "stop_riding", "evict_riders",
+                "summon_rider", "summon_ride"
+            ),
+            {
+                "start_riding": ("token_target", Chain(
+                    Choice(("teleport_ride", "teleport_rider")),
+                    Choice(("if_group_fits", "until_full"))
+                )),
+                "summon_rider": (_ID, Chain( # entityType
+                    "token_spawn_event", "token_string" # name tag
+                )),
+                "summon_ride": (_ID, Chain( # entityType
+                    Choice(("skip_riders", "no_ride_change", "reassign_rides")),
+                    "token_spawn_event", "token_string" # name tag
+                )),
+            }
+        )),
+        "save": Choice(("hold", "query", "resume")),
+        "say": "token_skip_line",
+        "schedule": (
+            Choice(("on_area_loaded",)), Choice(("add",)),
+            If("next_is_pos", (_FULL_POS, _FULL_POS), Choice(
+                ("circle", "tickingarea"),
+                # name of tickingarea
+                {"circle": "token_circle", "tickingarea": "token_string"}
+            )),
+            Arg("token_skip_line", ErrorType.EXP_FUNCTION_PATH, True)
+        ),
+        "seed": (),
+        "setblock": (_FULL_POS, _ID, Chain(
+            "token_bs_or_data", Choice(("destroy", "keep", "replace"))
+        )),
+        "setmaxplayers": Arg("token_integer", 1, 30),
+        "setworldspawn": Opt(_FULL_POS),
+        "spawnpoint": Chain("token_target", _FULL_POS),
+        "stop": (),
+        "stopsound": ("token_target", Opt("token_string")),
+        "tag": ("token_starrable_target", Choice(
+            ("add", "remove", "list"),
+            {"add": "token_tag", "remove": "token_tag"}
+        )),
+        "testfor": "token_target",
+        "tellraw": ("token_target", Arg("token_json", "object")),
+        "testforblock": (_FULL_POS, _ID, Opt("token_bs_or_data")),
+        "testforblocks": (_FULL_POS,) * 3 + (Opt(Choice(("masked", "all"))),),
+        "tickingarea": Choice(
+            ("add", "remove", "remove_all", "preload", "list"),
+            {
+                "add": (
+                    If("next_is_pos", (_FULL_POS, _FULL_POS),
+                       (Choice(("circle",)), "token_circle")),
+                    Chain("token_string", "token_boolean") # name, preload
+                ),
+                "remove": _POS_OR_NAME,
+                "preload": (_POS_OR_NAME, Opt("token_boolean")),
+                "list": Opt(Choice(("all-dimensions",))),
+            }
+        ),
+        "time": Choice(("add", "query", "set"), {
+            "add": "token_integer",
+            "query": Choice(("daytime", "gametime", "day")),
+            "set": If("next_is_number", "token_integer", Choice(
+                ("day", "noon", "sunrise", "sunset", "night", "midnight")
+            )),
+        }),
+        "title": _title("token_skip_line"),
+        "titleraw": _title(Arg("token_json", "object")),
+        "toggledownfall": (),
+        "volumearea": Choice(("add", "list", "remove", "remove_all"), {
+            # identifier, from, to, name
+            "add": ("token_string", _FULL_POS, _FULL_POS, Opt("token_string")),
+            "list": Opt(Choice(("all-dimensions",))),
+            "remove": _POS_OR_NAME,
+        }),
+        "worldbuilder": (),
+        "weather": Choice(("clear", "rain", "thunder", "query"), {
+            "clear": _WEATHER_DURATION,
+            "rain": _WEATHER_DURATION,
+            "thunder": _WEATHER_DURATION,
+        }),
+        "whitelist": Choice(
+            ("add", "list", "off", "on", "reload", "remove"),
+            {"add": "token_target", "remove": "token_target"}
+        ),
+    }
+
     def c_difficulty(self):
         if self.next_is_number():
             with self.create_token(TokenType.option) as tok:
-                value = self.expect(self.integer, tok)
+                value = self.expect(self.scan_integer, tok)
                 self.check_number(value, tok, 0, 3)
         else:
-            self.token_options(
-                "easy", "normal", "hard", "peaceful",
-                "p", "e", "n", "h"
-            )
+            self.token_options_in(_DIFFICULTIES)
     
     def c_effect(self):
         self.token_target() # player
         with self.create_token() as tok:
-            effect = self.expect(self.namespaced_id, tok)
+            effect = self.expect(self.scan_namespaced_id, tok)
             if effect == "clear":
                 tok.type = TokenType.option
                 return
@@ -813,20 +1238,15 @@ class CommandTokenizer(Tokenizer, VersionedMixin):
         with self.create_token() as tok:
             if self.next_is_number():
                 tok.type = TokenType.number
-                self.expect(self.integer, tok)
+                self.expect(self.scan_integer, tok)
             else:
                 tok.type = TokenType.string
-                self.expect(self.namespaced_id, tok)
+                self.expect(self.scan_namespaced_id, tok)
         if self.line_not_end():
             self.token_integer() # level
     
-    def c_event(self):
-        self.token_options("entity")
-        self.token_target()
-        self.token_string()
-    
     def token_anchor_option(self):
-        self.token_options("eyes", "feet")
+        self.token_options_in(_ANCHORS)
     
     @versioned_method(version=(1, 19, 50))
     def c_execute(self):
@@ -836,13 +1256,10 @@ class CommandTokenizer(Tokenizer, VersionedMixin):
                 TokenType.error, Error(ErrorType.EXP_EXECUTE_SUBCMD)
             ): pass
         while self.line_not_end() and subcmd is not None:
-            subcmd = self.token_options(
-                "align", "anchored", "as", "at", "facing", "in",
-                "positioned", "rotated", "run", "if", "unless"
-            )
+            subcmd = self.token_options_in(_EXECUTE_SUBCOMMANDS)
             if subcmd == "align":
                 with self.create_token(TokenType.option) as tok:
-                    axes = self.expect(self.word, tok)
+                    axes = self.expect(self.scan_word, tok)
                     if axes is not None:
                         axes = sorted(axes)
                         axes_set = set(axes)
@@ -860,7 +1277,7 @@ class CommandTokenizer(Tokenizer, VersionedMixin):
                 if self.next_is_pos():
                     self.token_full_pos()
                 else:
-                    self.token_options("entity")
+                    self.token_options_in(_ENTITY)
                     self.token_target()
                     self.token_anchor_option()
             elif subcmd == "in":
@@ -869,21 +1286,19 @@ class CommandTokenizer(Tokenizer, VersionedMixin):
                 if self.next_is_pos():
                     self.token_full_pos()
                 else:
-                    self.token_options("as")
+                    self.token_options_in(_AS)
                     self.token_target()
             elif subcmd == "rotated":
                 if self.next_is_rotation():
                     self.token_rotation()
                     self.token_rotation()
                 else:
-                    self.token_options("as")
+                    self.token_options_in(_AS)
                     self.token_target()
             elif subcmd == "run":
                 self.token_command()
             elif subcmd in ("if", "unless"):
-                testcmd = self.token_options(
-                    "block", "blocks", "entity", "score"
-                )
+                testcmd = self.token_options_in(_EXECUTE_CONDITIONS)
                 if testcmd == "block":
                     self.token_full_pos()
                     self.token_namespaced_id()
@@ -892,7 +1307,7 @@ class CommandTokenizer(Tokenizer, VersionedMixin):
                 elif testcmd == "blocks":
                     for _ in range(3):
                         self.token_full_pos()
-                    self.token_options("all", "masked")
+                    self.token_options_in(_BLOCKS_MODES)
                 elif testcmd == "entity":
                     self.token_target()
                 elif testcmd == "score":
@@ -910,9 +1325,9 @@ class CommandTokenizer(Tokenizer, VersionedMixin):
                         match_mode = True
                     self.skip_spaces()
                     if match_mode:
-                        self.token_options("matches")
+                        self.token_options_in(_MATCHES)
                         with self.create_token(TokenType.number) as tok:
-                            self.expect(self.number_range, tok)
+                            self.expect(self.scan_number_range, tok)
                     else:
                         self.token_target()
                         self.token_scoreboard()
@@ -929,149 +1344,74 @@ class CommandTokenizer(Tokenizer, VersionedMixin):
         self.token_target()
         self.token_full_pos()
         if self.peek_word() == "detect":
-            self.token_options("detect")
+            self.token_options_in(_DETECT)
             self.token_full_pos()
             self.token_namespaced_id()
             self.token_integer(-1, 32767)
         self.token_command()
     
-    def c_fill(self):
-        for _ in range(2):
-            self.token_full_pos()
-        self.token_namespaced_id()
-        if self.line_not_end():
-            self.token_bs_or_data()
-            if self.line_not_end():
-                mode = self.token_options(
-                    "destroy", "hollow", "keep", "outline", "replace"
-                )
-                if mode == "replace" and self.line_not_end():
-                    self.token_namespaced_id()
-                    if self.line_not_end():
-                        self.token_bs_or_data()
-    
-    def c_fog(self):
-        self.token_target()
-        mode = self.token_options("push", "pop", "remove")
-        if mode == "push":
-            self.token_namespaced_id() # Fog id
-        self.token_string() # userProvidedID
-    
-    def c_function(self):
-        self.token_skip_line(ErrorType.EXP_FUNCTION_PATH, required=True)
-    
     def token_gamemode_option(self):
         if self.next_is_number():
             with self.create_token(TokenType.option) as tok:
-                gm = self.expect(self.integer, tok)
+                gm = self.expect(self.scan_integer, tok)
                 if gm is not None and gm not in (0, 1, 2, 5):
                     tok.type = TokenType.error
                     tok.value = Error(ErrorType.INVALID_GAMEMODE_ID)
         else:
-            self.token_options(
-                "s", "c", "a", "d", "survival", "default",
-                "creative", "adventure", "spectator"
-            )
-    
-    def c_gamemode(self):
-        self.token_gamemode_option()
-        if self.line_not_end():
-            self.token_target()
+            self.token_options_in(_GAMEMODES)
     
     def c_gamerule(self):
         if self.line_not_end():
             with self.create_token(TokenType.string) as tok:
-                self.expect(self.word, tok)
+                self.expect(self.scan_word, tok)
             if self.line_not_end():
                 with self.create_token() as tok:
                     if self.next_is_number():
                         tok.type = TokenType.number
-                        self.expect(self.integer,tok)
+                        self.expect(self.scan_integer,tok)
                     else:
                         tok.type = TokenType.boolean
-                        self.expect(self.boolean, tok)
-    
-    def c_give(self):
-        self.token_target()
-        self.token_namespaced_id() # item
-        self.token_chained_arguments(
-            lambda: self.token_integer(1, 32767), # amount
-            lambda: self.token_integer(0, 32767), # data
-            lambda: self.token_json("object") # component
-        )
+                        self.expect(self.scan_boolean, tok)
     
     def c_help(self):
         if self.line_not_end():
             with self.create_token() as tok:
                 if self.next_is_number():
                     tok.type = TokenType.number
-                    self.expect(self.integer, tok)
+                    self.expect(self.scan_integer, tok)
                 else:
                     tok.type = TokenType.string
-                    self.expect(self.word, tok)
-
-    def c_immutableworld(self):
-        if self.line_not_end():
-            self.token_boolean()
+                    self.expect(self.scan_word, tok)
 
     def token_permission(self):
-        self.token_options("camera", "movement")
+        self.token_options_in(self.haspermission_args)
 
     def token_state(self):
         with self.create_token(TokenType.boolean) as tok:
-            state = self.expect(self.word, tok)
+            state = self.expect(self.scan_word, tok)
             if state not in ("enabled", "disabled"):
                 tok.type = TokenType.error
                 tok.value = Error(ErrorType.EXP_STATE)
 
-    @versioned_method(version=(1, 19, 80))
-    def c_inputpermission(self):
-        mode = self.token_options("query", "set")
-        self.token_target()
-        self.token_permission()
-        # In query mode, state is optional and in set mode its required
-        if mode == "set" or self.line_not_end():
-            self.token_state()
-    
-    def c_kick(self):
-        self.token_target()
-        self.skip_line() # reason (optional)
-    
-    def c_kill(self):
-        if self.line_not_end():
-            self.token_target()
-    
-    def c_list(self):
-        pass
-    
-    def c_locate(self):
-        mode = self.token_options("biome", "structure")
-        if mode == "biome":
-            self.token_namespaced_id()
-        elif mode == "structure":
-            self.token_namespaced_id()
-            if self.line_not_end():
-                self.token_boolean()
-    
     def c_loot(self):
-        target_mode = self.token_options("spawn", "give", "insert", "replace")
+        target_mode = self.token_options_in(_LOOT_TARGETS)
         if target_mode == "spawn" or target_mode == "insert":
             self.token_full_pos()
         elif target_mode == "give":
             self.token_target()
         elif target_mode == "replace":
-            replace_mode = self.token_options("block", "entity")
+            replace_mode = self.token_options_in(_BLOCK_OR_ENTITY)
             if replace_mode == "block":
                 self.token_full_pos()
-                self.token_options("slot.container")
+                self.token_options_in(_SLOT_CONTAINER)
             elif replace_mode == "entity":
                 self.token_target()
                 with self.create_token(TokenType.string) as tok:
-                    self.expect(self.word, tok)
+                    self.expect(self.scan_word, tok)
             self.token_integer() # slot id
             if self.next_is_number():
                 self.token_integer(check_min=1) # amount
-        source_mode = self.token_options("kill", "loot")
+        source_mode = self.token_options_in(_LOOT_SOURCES)
         if source_mode == "kill":
             self.token_target()
         elif source_mode == "loot":
@@ -1079,88 +1419,26 @@ class CommandTokenizer(Tokenizer, VersionedMixin):
         # mainhand | offhand | string (a tool)
         if self.line_not_end():
             with self.create_token() as tok:
-                tool = self.expect(self.string, tok)
+                tool = self.expect(self.scan_string, tok)
                 if tool == "mainhand" or tool == "offhand":
                     tok.type = TokenType.option
                 elif tool is not None: # make sure no error happens
                     tok.type = TokenType.string
 
-    def c_me(self):
-        self.token_skip_line()
-    
-    def c_mobevent(self):
-        self.token_namespaced_id()
-        if self.line_not_end():
-            self.token_boolean()
-    
-    def c_tell(self):
-        self.token_target()
-        self.token_skip_line()
-    
-    def c_music(self):
-        mode = self.token_options("play", "queue", "stop", "volumn")
-        def _volumn():
-            self.token_number(0, 1)
-        def _fade():
-            self.token_number(0, 10)
-        if mode == "play" or mode == "queue":
-            self.token_string()
-            self.token_chained_arguments(
-                _volumn,
-                _fade,
-                lambda: self.token_options("play_once", "loop")
-            )
-        elif mode == "stop":
-            if self.line_not_end():
-                _fade()
-        elif mode == "volumn":
-            _volumn()
-    
-    def c_op(self):
-        self.token_target()
-    
-    def c_particle(self):
-        self.token_namespaced_id()
-        if self.line_not_end():
-            self.token_full_pos()
-    
-    def c_playanimation(self):
-        self.token_target()
-        self.token_string() # animation
-        self.token_chained_arguments(
-            self.token_string, # next state
-            self.token_number, # blend out time
-            self.token_string, # stop expression
-            self.token_string # controller
-        )
-    
-    def c_playsound(self):
-        self.token_string() # sound
-        self.token_chained_arguments(
-            self.token_target, # player
-            self.token_full_pos, # position
-            lambda: self.token_number(check_min=0), # volumn
-            lambda: self.token_number(0, 256), # pitch
-            lambda: self.token_number(check_min=0) # min volumn
-        ) 
-    
-    def c_reload(self):
-        pass
-    
     def c_replaceitem(self):
-        mode = self.token_options("block", "entity")
+        mode = self.token_options_in(_BLOCK_OR_ENTITY)
         if mode == "block":
             self.token_full_pos()
-            self.token_options("slot.container")
+            self.token_options_in(_SLOT_CONTAINER)
         elif mode == "entity":
             self.token_target()
             with self.create_token(TokenType.string) as tok:
-                self.expect(self.word, tok) # slot
+                self.expect(self.scan_word, tok) # slot
         self.token_integer() # slot id
         # [oldItemHandling: ReplaceMode] <itemName: Item>
         using_handle_mode = False
         with self.create_token() as tok:
-            item_or_handle = self.expect(self.namespaced_id, tok)
+            item_or_handle = self.expect(self.scan_namespaced_id, tok)
             if item_or_handle in ("destroy", "keep"):
                 tok.type = TokenType.option
                 using_handle_mode = True
@@ -1175,59 +1453,11 @@ class CommandTokenizer(Tokenizer, VersionedMixin):
             lambda: self.token_json("object") # components
         )
     
-    def c_ride(self):
-        self.token_target()
-        mode = self.token_options(
-            "start_riding", "stop_riding", "evict_riders",
-            "summon_rider", "summon_ride"
-        )
-        if mode == "start_riding":
-            self.token_target()
-            self.token_chained_arguments(
-                lambda: self.token_options("teleport_ride", "teleport_rider"),
-                lambda: self.token_options("if_group_fits", "until_full")
-            )
-        elif mode == "summon_rider":
-            self.token_namespaced_id() # entityType
-            self.token_chained_arguments(
-                self.token_spawn_event, # spawn event
-                self.token_string # name tag
-            )
-        elif mode == "summon_ride":
-            self.token_namespaced_id() # entityType
-            self.token_chained_arguments(
-                lambda: self.token_options(
-                    "skip_riders", "no_ride_change", "reassign_rides"
-                ),
-                self.token_spawn_event, # spawn event
-                self.token_string # name tag
-            )
-    
-    def c_save(self):
-        self.token_options("hold", "query", "resume")
-    
-    def c_say(self):
-        self.token_skip_line()
-    
     def token_circle(self):
         # <center:full_pos(3)> <radius:int>
         self.token_full_pos()
         self.token_integer(check_min=0) # radius
 
-    def c_schedule(self):
-        self.token_options("on_area_loaded")
-        self.token_options("add")
-        if self.next_is_pos():
-            self.token_full_pos()
-            self.token_full_pos()
-        else:
-            mode = self.token_options("circle", "tickingarea")
-            if mode == "circle":
-                self.token_circle()
-            elif mode == "tickingarea":
-                self.token_string() # name of tickingarea
-        self.token_skip_line(ErrorType.EXP_FUNCTION_PATH, required=True)
-    
     def token_starrable_target(self):
         if self.current_char == "*":
             with self.create_token(TokenType.selector):
@@ -1236,30 +1466,25 @@ class CommandTokenizer(Tokenizer, VersionedMixin):
             self.token_target()
 
     def c_scoreboard(self):
-        mode = self.token_options("objectives", "players")
+        mode = self.token_options_in(_SCOREBOARD_MODES)
         if mode == "objectives":
-            submode = self.token_options("add", "list", "remove", "setdisplay")
+            submode = self.token_options_in(_OBJECTIVES_MODES)
             if submode == "add":
                 self.token_scoreboard()
-                self.token_options("dummy")
+                self.token_options_in(_DUMMY)
                 if self.line_not_end():
                     self.token_string() # display name
             elif submode == "remove":
                 self.token_scoreboard()
             elif submode == "setdisplay":
-                display_mode = self.token_options(
-                    "list", "sidebar", "belowname"
-                )
+                display_mode = self.token_options_in(_DISPLAY_SLOTS)
                 if self.line_not_end():
                     self.token_scoreboard()
                     if self.line_not_end():
                         if display_mode == "list" or display_mode == "sidebar":
-                            self.token_options("ascending", "descending")
+                            self.token_options_in(_SORT_ORDERS)
         elif mode == "players":
-            submode = self.token_options(
-                "set", "add", "remove", "list", "operation",
-                "random", "reset", "test"
-            )
+            submode = self.token_options_in(_PLAYERS_MODES)
             if submode in ("set", "add", "remove"):
                 self.token_starrable_target()
                 self.token_scoreboard()
@@ -1291,7 +1516,7 @@ class CommandTokenizer(Tokenizer, VersionedMixin):
                 self.token_scoreboard()
                 min_ = self.token_integer()
                 with self.create_token(TokenType.number) as tok:
-                    max_ = self.expect(self.integer, tok)
+                    max_ = self.expect(self.scan_integer, tok)
                     if (min_ is not None and max_ is not None) and \
                         min_ > max_:
                         tok.type = TokenType.error
@@ -1308,47 +1533,23 @@ class CommandTokenizer(Tokenizer, VersionedMixin):
                         self.char("*")
                         min_ = None
                     else:
-                        min_ = self.expect(self.integer, tok)
+                        min_ = self.expect(self.scan_integer, tok)
                 if self.line_not_end():
                     with self.create_token(TokenType.number) as tok:
                         if self.current_char == "*":
                             self.char("*")
                         else:
-                            max_ = self.expect(self.integer, tok)
+                            max_ = self.expect(self.scan_integer, tok)
                             if (min_ is not None and max_ is not None) and \
                                 min_ > max_:
                                 tok.type = TokenType.error
                                 tok.value = Error(ErrorType.IMPOSSIBLE_TEST)
     
-    def c_seed(self):
-        pass
-    
-    def c_setblock(self):
-        self.token_full_pos()
-        self.token_namespaced_id()
-        self.token_chained_arguments(
-            self.token_bs_or_data,
-            lambda: self.token_options("destroy", "keep", "replace")
-        )
-    
-    def c_setmaxplayers(self):
-        self.token_integer(1, 30)
-    
-    def c_setworldspawn(self):
-        if self.line_not_end():
-            self.token_full_pos()
-    
-    def c_spawnpoint(self):
-        self.token_chained_arguments(
-            self.token_target,
-            self.token_full_pos
-        )
-    
     def c_spreadplayers(self):
         self.token_full_pos(2)
         distance = self.token_number(check_min=0)
         with self.create_token(TokenType.number) as tok:
-            max_range = self.expect(self.number, tok)
+            max_range = self.expect(self.scan_number, tok)
             self.check_number(max_range, tok, 1)
             if max_range is not None and distance is not None and \
                 max_range <= distance:
@@ -1356,24 +1557,16 @@ class CommandTokenizer(Tokenizer, VersionedMixin):
                 tok.value = Error(ErrorType.IMPOSSIBLE_SPREAD)
         self.token_target()
     
-    def c_stop(self):
-        pass
-    
-    def c_stopsound(self):
-        self.token_target()
-        if self.line_not_end():
-            self.token_string()
-    
     def c_structure(self):
-        mode = self.token_options("save", "load", "delete")
+        mode = self.token_options_in(_STRUCTURE_MODES)
         self.token_string() # structure name
         if mode == "save":
             for _ in range(2):
                 self.token_full_pos()
             if self.line_not_end():
-                entity_given = self.token_bool_or_options("memory", "disk")
+                entity_given = self.token_bool_or_options_in(_STRUCTURE_SAVE_MODES)
                 if entity_given and self.line_not_end():
-                    self.token_options("memory", "disk")
+                    self.token_options_in(_STRUCTURE_SAVE_MODES)
                     if self.line_not_end():
                         self.token_boolean() # include blocks
         elif mode == "load":
@@ -1383,9 +1576,7 @@ class CommandTokenizer(Tokenizer, VersionedMixin):
                 # or just [includeEntities]
                 ## Second part:
                 # [includeBlocks] [integrity] [seed]
-                animate_given = not self.token_bool_or_options(
-                    "block_by_block", "layer_by_layer"
-                ) # animationMode or includeEntities
+                animate_given = not self.token_bool_or_options_in(_ANIMATION_MODES) # animationMode or includeEntities
                 arguments_next = []
                 if animate_given:
                     arguments_next.extend((
@@ -1403,10 +1594,8 @@ class CommandTokenizer(Tokenizer, VersionedMixin):
             
             self.token_full_pos()
             self.token_chained_arguments(
-                lambda: self.token_options(
-                    "0_degrees", "90_degrees", "180_degrees", "270_degrees"
-                ), # rotation
-                lambda: self.token_options("none", "x", "z", "xz"), # mirror
+                lambda: self.token_options_in(_STRUCTURE_ROTATIONS), # rotation
+                lambda: self.token_options_in(_MIRRORS), # mirror
                 _optional_args
             )
     
@@ -1444,7 +1633,7 @@ class CommandTokenizer(Tokenizer, VersionedMixin):
                         if self.line_not_end():
                             self.token_rotation()
                     else:
-                        self.token_options("facing")
+                        self.token_options_in(_FACING)
                         if self.next_is_pos():
                             self.token_full_pos()
                         else:
@@ -1459,13 +1648,6 @@ class CommandTokenizer(Tokenizer, VersionedMixin):
                 if self.line_not_end():
                     self.token_full_pos() # spawn pos
 
-    def c_tag(self):
-        self.token_starrable_target()
-        mode = self.token_options("add", "remove", "list")
-        if mode == "add" or mode == "remove":
-            with self.create_token(TokenType.tag) as tok:
-                self.expect(self.string, tok)
-    
     def c_teleport(self):
         # tp [<target>]
         if not self.next_is_pos():
@@ -1494,7 +1676,7 @@ class CommandTokenizer(Tokenizer, VersionedMixin):
                     else: # only YRot is given, the last boolean is not allowed
                         return
                 else:
-                    check_for_blocks = self.token_bool_or_options("facing")
+                    check_for_blocks = self.token_bool_or_options_in(_FACING)
                     if not check_for_blocks: # if using facing
                         # <entity> | <position>
                         if self.next_is_pos():
@@ -1510,123 +1692,6 @@ class CommandTokenizer(Tokenizer, VersionedMixin):
             if self.line_not_end():
                 self.token_boolean()
     
-    def c_tellraw(self):
-        self.token_target()
-        self.token_json("object")
-    
-    def c_testfor(self):
-        self.token_target()
-    
-    def c_testforblock(self):
-        self.token_full_pos()
-        self.token_namespaced_id() # block
-        if self.line_not_end():
-            self.token_bs_or_data()
-    
-    def c_testforblocks(self):
-        for _ in range(3):
-            self.token_full_pos()
-        if self.line_not_end():
-            self.token_options("masked", "all")
-    
-    def c_tickingarea(self):
-        mode = self.token_options(
-            "add", "remove", "remove_all", "preload", "list"
-        )
-        if mode == "add":
-            if self.next_is_pos():
-                for _ in range(2):
-                    self.token_full_pos()
-            else:
-                self.token_options("circle")
-                self.token_circle()
-            self.token_chained_arguments(
-                self.token_string, # name
-                self.token_boolean # preload
-            )
-        elif mode == "remove":
-            if self.next_is_pos():
-                self.token_full_pos()
-            else:
-                self.token_string()
-        elif mode == "preload":
-            if self.next_is_pos():
-                self.token_full_pos()
-            else:
-                self.token_string()
-            if self.line_not_end():
-                self.token_boolean() # preload
-        elif mode == "list":
-            if self.line_not_end():
-                self.token_options("all-dimensions")
-    
-    def c_time(self):
-        mode = self.token_options("add", "query", "set")
-        if mode == "add":
-            self.token_integer()
-        elif mode == "query":
-            self.token_options("daytime", "gametime", "day")
-        elif mode == "set":
-            if self.next_is_number():
-                self.token_integer()
-            else:
-                self.token_options(
-                    "day", "noon", "sunrise", "sunset", "night", "midnight"
-                )
-    
-    def _title(self, token_msg_func):
-        self.token_target()
-        mode = self.token_options(
-            "clear", "reset", "title", "subtitle", "actionbar", "times"
-        )
-        if mode in ("title", "subtitle", "actionbar"):
-            token_msg_func()
-        elif mode == "times":
-            for _ in range(3):
-                self.token_integer()
-    
-    def c_title(self):
-        self._title(self.token_skip_line)
-    
-    def c_titleraw(self):
-        self._title(lambda: self.token_json("object"))
-    
-    def c_toggledownfall(self):
-        pass
-    
-    def c_volumearea(self):
-        mode = self.token_options("add", "list", "remove", "remove_all")
-        if mode == "add":
-            self.token_string() # identifier
-            self.token_full_pos() # from
-            self.token_full_pos() # to
-            if self.line_not_end():
-                self.token_string() # name
-        elif mode == "list":
-            if self.line_not_end():
-                self.token_options("all-dimensions")
-        elif mode == "remove":
-            if self.next_is_pos():
-                self.token_full_pos()
-            else:
-                self.token_string()
-    
-    def c_worldbuilder(self):
-        pass
-    
-    def c_weather(self):
-        mode = self.token_options("clear", "rain", "thunder", "query")
-        if mode in ("clear", "rain", "thunder"):
-            if self.line_not_end():
-                self.token_integer(0, 1000000) # duration
-    
-    def c_whitelist(self):
-        mode = self.token_options(
-            "add", "list", "off", "on", "reload", "remove"
-        )
-        if mode == "add" or mode == "remove":
-            self.token_target()
-    
     def c_wsserver(self):
         with self.create_token() as tok:
             arg = self.skip_line()
@@ -1637,13 +1702,13 @@ class CommandTokenizer(Tokenizer, VersionedMixin):
     
     def c_xp(self):
         with self.create_token(TokenType.number) as tok:
-            self.expect(self.raw_integer, tok)
+            self.expect(self.scan_raw_integer, tok)
             # Here we expect raw integer.
             # If not so, "/xp 1L @s" throws "Expecting a terminating character"
             if self.current_char == "L" or self.current_char == "l":
                 self.forward()
             # Now that we have detected "L", we should call `argument_end`
-            self.expect(self.argument_end, tok)
+            self.expect(self.scan_argument_end, tok)
         if self.line_not_end():
             self.token_target()
 
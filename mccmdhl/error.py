@@ -1,7 +1,11 @@
 # Error & Warning definitions for Minecraft Command Tokenizer
 import enum
+import bisect
 
-__all__ = ["ErrorType", "Error", "WarningType"]
+__all__ = [
+    "ErrorType", "Error", "WarningType", "WarningMessage", "OptionList",
+    "Keywords"
+]
 
 class ErrorType(enum.Enum):
     EXP_TERMINATING_CHAR = "Expecting a terminating character"
@@ -53,6 +57,9 @@ class ErrorType(enum.Enum):
     WRONG_EXECUTE_END = '"execute" must end with "run", "if" or "unless"'
     AT_LEAST_ONE_ELEMENT = 'At least 1 element is required'
 
+# Errors and warnings only keep their type and arguments; the message is
+# formatted when `str` is called, since most of them are never shown
+
 class Error(Exception):
     def __init__(self, error_type: ErrorType, **kwargs) -> None:
         super().__init__()
@@ -62,6 +69,66 @@ class Error(Exception):
     def __str__(self) -> str:
         return self.type.value.format(**self.error_kwargs)
 
+class OptionList(tuple):
+    # Argument of messages listing the expected options,
+    # formatted as "'a', 'b', 'c'"
+    def __str__(self) -> str:
+        return ", ".join(repr(opt) for opt in self)
+
+class Keywords(frozenset):
+    # The options of `CommandTokenizer.token_options`: a set, so checking
+    # a word is quick, that keeps the order of the options (`order`) for
+    # messages, in which it is formatted like `OptionList`. The options
+    # are also kept sorted for `longest_prefix` and `completions`. Use
+    # `intern` to make each set of options only once.
+    _interned = {} # tuple of options -> `Keywords`
+
+    def __new__(cls, options):
+        self = super().__new__(cls, options)
+        self.order = OptionList(options)
+        self._sorted = tuple(sorted(self))
+        return self
+
+    @classmethod
+    def intern(cls, options: tuple) -> "Keywords":
+        res = cls._interned.get(options)
+        if res is None:
+            res = cls._interned[options] = cls(options)
+        return res
+
+    def longest_prefix(self, word: str) -> int:
+        # Length of the longest beginning of `word` that some option
+        # begins with, i.e. where a wrong option goes wrong
+        # The option sharing most of `word` sorts right next to it.
+        options = self._sorted
+        i = bisect.bisect_left(options, word)
+        res = 0
+        for option in options[max(i - 1, 0):i + 1]:
+            length = 0
+            for char, option_char in zip(word, option):
+                if char != option_char:
+                    break
+                length += 1
+            if length > res:
+                res = length
+        return res
+
+    def completions(self, prefix: str) -> list:
+        # Options that begin with `prefix`, sorted
+        options = self._sorted
+        res = []
+        for i in range(bisect.bisect_left(options, prefix), len(options)):
+            if not options[i].startswith(prefix):
+                break
+            res.append(options[i])
+        return res
+
+    def __str__(self) -> str:
+        return str(self.order)
+
+    def __repr__(self) -> str:
+        return "Keywords(%r)" % (tuple(self.order),)
+
 class WarningType(enum.Enum):
     NO_PERMISSION = "Function files can't execute /{command} because they " \
         "don't have enough permission level"
@@ -69,3 +136,17 @@ class WarningType(enum.Enum):
         "before the 1.19.40 update (See MCPE-152314); It's recommended to " \
         'just omit the "data" entry'
 
+
+class WarningMessage:
+    # Value of warning tokens, like `Error` is for error tokens
+    __slots__ = ("type", "warning_kwargs")
+
+    def __init__(self, warning_type: WarningType, **kwargs) -> None:
+        self.type = warning_type
+        self.warning_kwargs = kwargs
+
+    def __str__(self) -> str:
+        return self.type.value.format(**self.warning_kwargs)
+
+    def __repr__(self) -> str:
+        return "<WarningMessage %s>" % self.type.name
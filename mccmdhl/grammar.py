@@ -0,0 +1,164 @@
+# Declarative grammar of commands
+# A rule describes the arguments of a command with the nodes below, whose
+# leaves are names of `CommandTokenizer` methods. `compile_rule` turns a
+# rule into a flat program of instructions once, and `run_program` (the
+# handler of every such command) executes it on a tokenizer.
+#   "token_target"            call a method
+#   Arg("token_integer", 0)   call a method with arguments
+#   ["a", "b"] or Seq(...)    one after another
+#   Opt(...)                  only if the line has not ended
+#   Chain(a, b, ...)          like `CommandTokenizer.token_chained_arguments`
+#   Choice(options, branches, default)
+#                             read one of `options` and continue with its
+#                             branch; others (or an invalid option) continue
+#                             with `default`
+#   If("next_is_pos", then, else_)
+#                             choose by calling a method, which must not
+#                             read anything
+#   Versions({version: rule}) the rule used from each version on; a rule
+#                             of None means the command does not exist
+
+from mccmdhl.error import Keywords
+
+__all__ = [
+    "Arg", "Seq", "Opt", "Chain", "Choice", "If", "Versions",
+    "compile_rule", "run_program"
+]
+
+class Arg:
+    __slots__ = ("method", "args")
+
+    def __init__(self, method: str, *args) -> None:
+        self.method = method
+        self.args = args
+
+class Seq:
+    __slots__ = ("items",)
+
+    def __init__(self, *items) -> None:
+        self.items = items
+
+class Opt(Seq):
+    __slots__ = ()
+
+class Chain(Seq):
+    __slots__ = ()
+
+class Choice:
+    __slots__ = ("options", "branches", "default")
+
+    def __init__(self, options: tuple, branches = None, default = ()):
+        self.options = options
+        self.branches = branches or {}
+        self.default = default
+
+class If:
+    __slots__ = ("predicate", "then", "else_")
+
+    def __init__(self, predicate: str, then, else_ = ()) -> None:
+        self.predicate = predicate
+        self.then = then
+        self.else_ = else_
+
+class Versions:
+    # Like `VersionedMethod`, but for rules
+    __slots__ = ("version2rule", "versions")
+
+    def __init__(self, version2rule: dict) -> None:
+        self.version2rule = version2rule
+        self.versions = sorted(version2rule, reverse=True)
+
+    def resolve(self, version: tuple):
+        # Return the rule of `version`, or None if there is none
+        for v in self.versions:
+            if version >= v:
+                return self.version2rule[v]
+        return None
+
+# Instructions of a program are (opcode, a, b):
+CALL = 0        # call method `a` with arguments `b`
+SKIP_IF_END = 1 # go to `a` if the line has ended
+OPTIONS = 2     # read one of options `a` (`Keywords`); go to `b[option]`
+                # or `b[None]`
+IF = 3          # go to `b` if method `a` returns false
+JUMP = 4        # go to `a`
+
+def compile_rule(rule) -> tuple:
+    # The program of `rule`
+    program = []
+    def _patch(i: int, a, b = None):
+        program[i] = (program[i][0], a, b)
+    def _emit(node):
+        if isinstance(node, str):
+            program.append((CALL, node, ()))
+        elif isinstance(node, Arg):
+            program.append((CALL, node.method, node.args))
+        elif isinstance(node, (list, tuple)):
+            for item in node:
+                _emit(item)
+        elif isinstance(node, Opt):
+            skip = len(program)
+            program.append((SKIP_IF_END, None, None))
+            _emit(node.items)
+            _patch(skip, len(program))
+        elif isinstance(node, Chain):
+            skips = []
+            for item in node.items:
+                skips.append(len(program))
+                program.append((SKIP_IF_END, None, None))
+                _emit(item)
+            for skip in skips:
+                _patch(skip, len(program))
+        elif isinstance(node, Seq):
+            _emit(node.items)
+        elif isinstance(node, Choice):
+            choice = len(program)
+            program.append((OPTIONS, None, None))
+            targets = {}
+            jumps = []
+            for option, branch in node.branches.items():
+                assert option in node.options, option
+                targets[option] = len(program)
+                _emit(branch)
+                jumps.append(len(program))
+                program.append((JUMP, None, None))
+            default = len(program)
+            _emit(node.default)
+            for jump in jumps:
+                _patch(jump, len(program))
+            # Options without a branch use the default one
+            table = dict.fromkeys(node.options, default)
+            table[None] = default
+            table.update(targets)
+            _patch(choice, Keywords.intern(tuple(node.options)), table)
+        elif isinstance(node, If):
+            test = len(program)
+            program.append((IF, None, None))
+            _emit(node.then)
+            jump = len(program)
+            program.append((JUMP, None, None))
+            _patch(test, node.predicate, len(program))
+            _emit(node.else_)
+            _patch(jump, len(program))
+        else:
+            raise TypeError("Not a rule: %r" % (node,))
+    _emit(rule)
+    return tuple(program)
+
+def run_program(tokenizer, program: tuple):
+    # Execute `program` (from `compile_rule`) on `tokenizer`
+    pc = 0
+    end = len(program)
+    while pc < end:
+        op, a, b = program[pc]
+        if op == CALL:
+            getattr(tokenizer, a)(*b)
+            pc += 1
+        elif op == SKIP_IF_END:
+            pc = pc + 1 if tokenizer.line_not_end() else a
+        elif op == OPTIONS:
+            pc = b[tokenizer.token_options_in(a)]
+        elif op == IF:
+            pc = pc + 1 if getattr(tokenizer, a)() else b
+        else:
+            pc = a
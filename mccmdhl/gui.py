@@ -1,3 +1,6 @@
+import queue
+import threading
+import traceback
 import tkinter
 from tkinter.font import Font as TkFont
 # Yes, we do need idlelib since listening to insert and delete event of the
@@ -8,15 +11,112 @@ from mccmdhl.command import TokenType, CommandTokenizer
 
 __all__ = ["MCCommandHighlighter"]
 
+# The highlighter remembers the tags it has added to each line as
+# {tag name: spans}, where spans is a sorted list of disjoint, non-touching
+# (begin column, end column) pairs, just like how Tk stores a tag.
+# Column `len(line)` is the newline at end of line.
+
+def _merge_spans(spans: list) -> list:
+    # sort `spans` and join the ones that overlap or touch
+    spans.sort()
+    res = []
+    for begin, end in spans:
+        if res and begin <= res[-1][1]:
+            if end > res[-1][1]:
+                res[-1] = (res[-1][0], end)
+        else:
+            res.append((begin, end))
+    return res
+
+def _subtract_spans(spans: list, other: list) -> list:
+    # parts of `spans` that are not covered by `other`
+    res = []
+    i = 0
+    for begin, end in spans:
+        while i < len(other) and other[i][1] <= begin:
+            i += 1
+        j = i
+        while begin < end and j < len(other) and other[j][0] < end:
+            if other[j][0] > begin:
+                res.append((begin, other[j][0]))
+            begin = max(begin, other[j][1])
+            j += 1
+        if begin < end:
+            res.append((begin, end))
+    return res
+
+def _insert_into_spans(line_tags: dict, col: int, count: int) -> dict:
+    # How Tk moves tags when `count` chars are inserted at `col`: the new
+    # chars get the tags that the chars on both sides have
+    res = {}
+    for tag, spans in line_tags.items():
+        moved = []
+        for begin, end in spans:
+            if begin >= col:
+                moved.append((begin + count, end + count))
+            elif end > col:
+                moved.append((begin, end + count))
+            else:
+                moved.append((begin, end))
+        res[tag] = moved
+    return res
+
+def _delete_from_spans(line_tags: dict, col1: int, col2: int) -> dict:
+    # How Tk moves tags when the chars from `col1` to `col2` are deleted
+    def _move(col):
+        if col <= col1:
+            return col
+        return max(col1, col - (col2 - col1))
+    res = {}
+    for tag, spans in line_tags.items():
+        moved = []
+        for begin, end in spans:
+            begin, end = _move(begin), _move(end)
+            if begin < end:
+                moved.append((begin, end))
+        if moved:
+            res[tag] = _merge_spans(moved)
+    return res
+
 class MCCommandHighlighter:
     ERROR_FORMAT = "[{pos_begin}-{pos_end};{level}] {message}"
+    # Used when `background` is set:
+    DEBOUNCE_MS = 50 # wait for this long after the last edit
+    POLL_MS = 10 # how often to check for results of the worker thread
+    CHUNK_LINES = 200 # lines tokenized and applied together
+    # Otherwise, updates of more than `LAZY_LINES` lines (like opening a
+    # file or switching version) only highlight the visible lines (plus
+    # `VIEW_MARGIN` lines around) at once, and the rest in idle time
+    LAZY_LINES = 500
+    VIEW_MARGIN = 50
 
-    def __init__(self, text: tkinter.Text, set_error_msg, version=(1, 19, 70)):
+    def __init__(
+        self, text: tkinter.Text, set_error_msg, version=(1, 19, 70),
+        background=False
+    ):
         # set_error_msg:function; Whenever error message changes, this is
         # called with 1 Token as argument, which is the error token.
         # This argument might be None when no error is found in this line
+        # background: tokenize on a worker thread instead of right after
+        # every edit, so that the editor keeps responding on large texts
         self.text = text
-        self.version = version
+        self.set_tokenizer_version(version)
+        # Tags we have added to each line (see `_merge_spans`), or None
+        # when they are unknown
+        self.line_tags = [None] * self.line_count()
+        # Whether each line needs to be tokenized again
+        self.line_dirty = [True] * self.line_count()
+        self.background = background
+        # Every edit starts a new generation; results of the worker thread
+        # from an older generation are thrown away
+        self.generation = 0
+        self._dispatch_id = None # `after` id of the pending dispatch
+        self._poll_id = None # `after` id of the pending poll
+        self._submitted = None # generation of the last job
+        self._idle_id = None # `after` id of the pending idle update
+        self._jobs = queue.Queue()
+        self._results = queue.Queue()
+        self._worker = None
         self.BASIC_FONT = TkFont(font=text.cget("font"))
         self.text_redir = WidgetRedirector(self.text)
         self.orig_ins = self.text_redir.register("insert", self.text_insert)
@@ -59,11 +159,23 @@ class MCCommandHighlighter:
         for tok_type, color in self.TOKEN2FORMAT.items():
             self.text.tag_config(tok_type.name, **color)
     
+    def set_tokenizer_version(self, version: tuple):
+        # Use the tokenizer class specialized for `version`
+        self.version = version
+        self.tokenizer_class = CommandTokenizer.specialize(version)
+    
     def update_version(self, version: tuple):
         # Update version
-        self.version = version
+        self.set_tokenizer_version(version)
         last_lineno = self.lineno_from_index(self.text.index("end"))
-        self.update_text(1, last_lineno)
+        if self.background:
+            self.line_dirty = [True] * len(self.line_tags)
+            self.schedule_update()
+        elif last_lineno > self.LAZY_LINES:
+            self.line_dirty = [True] * len(self.line_tags)
+            self.update_lazily()
+        else:
+            self.update_text(1, last_lineno)
     
     def errmsg_from_token(self, token):
         # get error message from token
@@ -80,60 +192,318 @@ class MCCommandHighlighter:
             message = str(token.value)
         )
 
+    def line_count(self) -> int:
+        # number of lines in the Text widget
+        return self.lineno_from_index(self.text.index("end")) - 1
+
     def text_insert(self, index: str, chars: str, tags=None):
         index = self.text.index(index)
         self.orig_ins(index, chars, tags)
         # We update in group of lines
-        line_count = chars.count("\n")
-        line_start = self.lineno_from_index(index)
-        line_end = line_start + line_count
-        self.update_text(line_start, line_end)
+        line_start, col = map(int, index.split("."))
+        if line_start > len(self.line_tags):
+            # Inserting at "end" actually inserts before the last newline
+            line_start, col = len(self.line_tags), None
+        line_end = line_start + self.line_count() - len(self.line_tags)
+        if line_end == line_start and col:
+            old = self.line_tags[line_start - 1]
+            if old is not None:
+                old = _insert_into_spans(old, col, len(chars))
+            self.line_tags[line_start - 1] = old
+            self.line_dirty[line_start - 1] = True
+        else:
+            # Lines are split; besides, when inserting at the start of a
+            # line, tags of the newline before might be given to new chars
+            self.replace_lines(
+                line_start, line_start, line_end - line_start + 1
+            )
+        self.lines_changed(line_start, line_end)
     
     def text_delete(self, index1: str, index2=None):
         index1 = self.text.index(index1)
-        if index2 is not None:
-            index2_ = self.text.index(index2)
+        if index2 is None:
+            index2 = self.text.index(index1 + "+1c")
+        else:
+            index2 = self.text.index(index2)
         self.orig_del(index1, index2)
+        if index1 == index2:
+            return # Nothing deleted, like `delete("end")`
         # We update in group of lines
-        line_start = self.lineno_from_index(index1)
-        if index2 is None:
-            line_end = line_start
+        line_start, col1 = map(int, index1.split("."))
+        line_end, col2 = map(int, index2.split("."))
+        removed = len(self.line_tags) - self.line_count()
+        if removed == 0 and line_end == line_start:
+            old = self.line_tags[line_start - 1]
+            if old is not None:
+                old = _delete_from_spans(old, col1, col2)
+            self.line_tags[line_start - 1] = old
+            self.line_dirty[line_start - 1] = True
+        else:
+            self.replace_lines(line_start, line_start + removed, 1)
+        self.lines_changed(line_start, line_start)
+    
+    def replace_lines(self, line_start: int, line_end: int, count: int):
+        # Lines from `line_start` to `line_end` become `count` lines with
+        # unknown tags
+        self.line_tags[line_start - 1:line_end] = [None] * count
+        self.line_dirty[line_start - 1:line_end] = [True] * count
+    
+    def lines_changed(self, line_start: int, line_end: int):
+        # Called after lines from `line_start` to `line_end` are edited
+        if self.background:
+            self.schedule_update()
+        elif line_end - line_start >= self.LAZY_LINES:
+            self.update_lazily()
         else:
-            line_end = self.lineno_from_index(index2_)
-        self.update_text(line_start, line_end)
+            self.update_text(line_start, line_end)
     
     def update_text(self, line_start: int, line_end: int):
         # Recolorize the text from `line_start` to `line_end`
-        ## get tokens
+        line_end = min(line_end, len(self.line_tags))
+        errors = self._update_lines(line_start, line_end)
+        cursor_line = self.lineno_from_index(self.text.index("insert"))
+        if line_start <= cursor_line <= line_end:
+            self.error_set(errors[cursor_line - line_start])
+        else:
+            self.error_set(None)
+    
+    def _update_lines(self, line_start: int, line_end: int) -> list:
+        # Recolorize the lines and return the first error of each line
         index1, index2 = "%s.0" % line_start, "%s.end" % line_end
         src = self.text.get(index1, index2)
-        tokenizer = CommandTokenizer(
-            src, version=self.version,
-            lineno_start=line_start, col_start=0
+        new_tags, errors = self.tokenize_lines(
+            self.tokenizer_class, src, line_start, line_end
         )
-        all_tokens = tokenizer.get_tokens() + tokenizer.get_warnings()
-        ## remove old
-        for tok_type in self.TOKEN2FORMAT:
-            self.text.tag_remove(tok_type.name, index1, index2)
-        ## update
+        self.apply_tags(line_start, new_tags)
+        return errors
+    
+    def _update_dirty(self, first: int, last: int):
+        # Recolorize the dirty lines from `first` to `last`
         cursor_line = self.lineno_from_index(self.text.index("insert"))
-        error_tok = None
+        while True:
+            try:
+                i = self.line_dirty.index(True, first - 1, last)
+            except ValueError:
+                break
+            j = i + 1
+            while j < last and self.line_dirty[j]:
+                j += 1
+            errors = self._update_lines(i + 1, j)
+            if i < cursor_line <= j:
+                self.error_set(errors[cursor_line - i - 1])
+    
+    def update_lazily(self):
+        # Recolorize the dirty lines around the visible area now, and the
+        # others in idle time
+        first, last = self.visible_lines()
+        self._update_dirty(
+            max(1, first - self.VIEW_MARGIN),
+            min(len(self.line_dirty), last + self.VIEW_MARGIN)
+        )
+        if self._idle_id is None and True in self.line_dirty:
+            self._idle_id = self.text.after_idle(self.idle_update)
+    
+    def idle_update(self):
+        # Recolorize one chunk of dirty lines, visible lines first, then
+        # wait for the next idle time if there are more
+        self._idle_id = None
+        first, last = self.visible_lines()
+        try:
+            i = self.line_dirty.index(True, first - 1, last)
+        except ValueError:
+            try:
+                i = self.line_dirty.index(True)
+            except ValueError:
+                return # All done
+        self._update_dirty(i + 1, min(
+            i + self.CHUNK_LINES, len(self.line_dirty)
+        ))
+        if True in self.line_dirty:
+            self._idle_id = self.text.after_idle(self.idle_update)
+    
+    @staticmethod
+    def tokenize_lines(tokenizer_class, src: str, line_start, line_end):
+        # Tokenize `src`, which is the text from line `line_start` to
+        # `line_end`. Return the tags of each line and the first error or
+        # warning token of each line (or None).
+        # NOTE this does not use the Text widget, so it is safe to call it
+        # from another thread
+        tokenizer = tokenizer_class(src, lineno_start=line_start, col_start=0)
+        all_tokens = tokenizer.get_tokens() + tokenizer.get_warnings()
+        lines = tokenizer.lines
+        new_tags = [{} for _ in range(line_end - line_start + 1)]
+        errors = [None] * len(new_tags)
         for token in all_tokens:
-            # Update error message if token is error
-            pos_end = token.pos_end
+            lineno, col = lines.position(token.begin)
+            end_col = col + token.end - token.begin
             if token.type in (TokenType.error, TokenType.warning):
-                # Update error message, if user's cursor is at this line
-                if self.lineno_from_index(token.pos_begin) == cursor_line and \
-                    error_tok == None:
-                    error_tok = token
-                if token.pos_begin == token.pos_end:
+                if errors[lineno - line_start] is None:
+                    errors[lineno - line_start] = token
+                if token.begin == token.end:
                     # Some of the errors' length is 0 (e.g. from 1.20 to
-                    # 1.20), but we still want to show them. So give these errors
-                    # one more column
-                    pos_end += "+1c"
-            # Add tag
-            self.text.tag_add(token.type.name, token.pos_begin, pos_end)
-        self.error_set(error_tok)
+                    # 1.20), but we still want to show them. So give these
+                    # errors one more column
+                    end_col += 1
+            new_tags[lineno - line_start].setdefault(
+                token.type.name, []
+            ).append((col, end_col))
+        for line_tags in new_tags:
+            for spans in line_tags.values():
+                spans[:] = _merge_spans(spans)
+        return new_tags, errors
+    
+    def apply_tags(self, line_start: int, new_tags: list):
+        # Give the lines from `line_start` the tags in `new_tags` (result of
+        # `tokenize_lines`). Only the tags that differ from what each line
+        # has now are removed or added.
+        unknown_start = None # first line of a group of unknown lines
+        for i, line_tags in enumerate(new_tags):
+            lineno = line_start + i
+            old_tags = self.line_tags[lineno - 1]
+            self.line_tags[lineno - 1] = line_tags
+            self.line_dirty[lineno - 1] = False
+            if old_tags is None:
+                # We don't know the tags of this line
+                if unknown_start is None:
+                    unknown_start = lineno
+                continue
+            if unknown_start is not None:
+                self._clear_lines(unknown_start, lineno - 1)
+                unknown_start = None
+            for tag in old_tags.keys() | line_tags.keys():
+                old = old_tags.get(tag, [])
+                new = line_tags.get(tag, [])
+                if old == new:
+                    continue
+                for begin, end in _subtract_spans(old, new):
+                    self.text.tag_remove(
+                        tag, *self._span_indexes(lineno, begin, end)
+                    )
+                for begin, end in _subtract_spans(new, old):
+                    self.text.tag_add(
+                        tag, *self._span_indexes(lineno, begin, end)
+                    )
+        if unknown_start is not None:
+            self._clear_lines(unknown_start, line_start + len(new_tags) - 1)
+
+    @staticmethod
+    def _span_indexes(lineno: int, begin: int, end: int):
+        # Text widget indexes of a span of line `lineno`
+        # ("+1c" so that the span can include the newline)
+        return "%d.%d" % (lineno, begin), "%d.%d+1c" % (lineno, end - 1)
+
+    def _clear_lines(self, line_start: int, line_end: int):
+        # Remove all the tags from `line_start` to `line_end` (including
+        # the newline at the end) and add the tags in `line_tags`
+        index1, index2 = "%d.0" % line_start, "%d.end+1c" % line_end
+        for tok_type in self.TOKEN2FORMAT:
+            self.text.tag_remove(tok_type.name, index1, index2)
+        for lineno in range(line_start, line_end + 1):
+            for tag, spans in self.line_tags[lineno - 1].items():
+                for begin, end in spans:
+                    self.text.tag_add(
+                        tag, *self._span_indexes(lineno, begin, end)
+                    )
+
+    # Background mode
+    # Edits only mark lines as dirty. `DEBOUNCE_MS` after the last edit,
+    # the dirty lines are copied from the widget and tokenized by a worker
+    # thread, chunk by chunk, starting from the visible ones. The main thread
+    # polls for the results and applies them, unless another edit has
+    # started a new generation since.
+
+    def visible_lines(self):
+        # first and last line shown in the Text widget
+        first = self.lineno_from_index(self.text.index("@0,0"))
+        last = self.lineno_from_index(
+            self.text.index("@0,%d" % self.text.winfo_height())
+        )
+        return first, last
+
+    def dirty_chunks(self, first: int, last: int) -> list:
+        # (line_start, line_end) of groups of dirty lines, at most
+        # `CHUNK_LINES` each; chunks from `first` to `last` come first
+        chunks = []
+        lineno = 1
+        count = len(self.line_dirty)
+        while lineno <= count:
+            if not self.line_dirty[lineno - 1]:
+                lineno += 1
+                continue
+            line_start = lineno
+            while lineno <= count and self.line_dirty[lineno - 1] and \
+                lineno - line_start < self.CHUNK_LINES:
+                lineno += 1
+            chunks.append((line_start, lineno - 1))
+        chunks.sort(key=lambda chunk: not (
+            chunk[0] <= last and chunk[1] >= first
+        ))
+        return chunks
+
+    def schedule_update(self):
+        # Start a new generation and dispatch after `DEBOUNCE_MS`
+        self.generation += 1
+        if self._dispatch_id is not None:
+            self.text.after_cancel(self._dispatch_id)
+        self._dispatch_id = self.text.after(self.DEBOUNCE_MS, self.dispatch)
+
+    def dispatch(self):
+        # Send the dirty lines to the worker thread
+        self._dispatch_id = None
+        chunks = []
+        for line_start, line_end in self.dirty_chunks(*self.visible_lines()):
+            src = self.text.get("%d.0" % line_start, "%d.end" % line_end)
+            chunks.append((line_start, line_end, src))
+        if not chunks:
+            return
+        if self._worker is None:
+            self._worker = threading.Thread(target=self._work, daemon=True)
+            self._worker.start()
+        self._jobs.put((self.generation, self.tokenizer_class, chunks))
+        self._submitted = self.generation
+        if self._poll_id is None:
+            self._poll_id = self.text.after(self.POLL_MS, self.poll)
+
+    def _work(self):
+        # Body of the worker thread
+        while True:
+            generation, tokenizer_class, chunks = self._jobs.get()
+            for line_start, line_end, src in chunks:
+                if generation != self.generation:
+                    break # Cancelled by a newer edit
+                try:
+                    result = self.tokenize_lines(
+                        tokenizer_class, src, line_start, line_end
+                    )
+                except Exception:
+                    traceback.print_exc()
+                    continue
+                self._results.put((generation, line_start, line_end, result))
+            self._results.put((generation, None, None, None)) # Job done
+
+    def poll(self):
+        # Apply the results that the worker thread has sent
+        self._poll_id = None
+        job_done = False
+        cursor_line = self.lineno_from_index(self.text.index("insert"))
+        while True:
+            try:
+                generation, line_start, line_end, result = \
+                    self._results.get_nowait()
+            except queue.Empty:
+                break
+            if generation != self.generation:
+                continue # Stale
+            if line_start is None:
+                job_done = True
+                continue
+            new_tags, errors = result
+            self.apply_tags(line_start, new_tags)
+            if line_start <= cursor_line <= line_end:
+                self.error_set(errors[cursor_line - line_start])
+        if not job_done and self._submitted == self.generation:
+            # Otherwise, the next `dispatch` will start polling again
+            self._poll_id = self.text.after(self.POLL_MS, self.poll)
 
 if __name__ == "__main__":
     tokenizer = CommandTokenizer("camerashake add @a ")
@@ -2,10 +2,12 @@
 # This JSON does not allow the "null" constant, since it seems to be
 # deprecated in Minecraft
 # Besides, it can not handle multi-line JSON
+import re
+
 from mccmdhl.tokenizer_base import *
 from mccmdhl.error import *
 
-__all__ = ["JSONTokenizer"]
+__all__ = ["JSONTokenizer", "fast_json_tokens"]
 
 class JSONTokenizer(Tokenizer):
     
@@ -119,6 +121,107 @@ class JSONTokenizer(Tokenizer):
             return True
         return False
 
+# Patterns of `fast_json_tokens`; each includes the spaces after it, like
+# the tokens of `JSONTokenizer` do
+_SPACES = re.compile(" *")
+_STRING = re.compile(r'"(?:\\"|\\(?!")|[^"\\\n\x04])*" *')
+_NUMBER = re.compile(r"-?[0-9]+(?:\.[0-9]+)? *")
+_CONSTANT = re.compile(r"(?:true|false)(?=[ ,\]}]|$)")
+
+def fast_json_tokens(
+    src: str, begin: int, end: int, lines: LineIndex, expect = "any"
+):
+    """
+    Tokenize `src[begin:end]` like `JSONTokenizer.get_tokens(expect)`
+    does, reading each string, number and constant with one regex match.
+    Return None as soon as anything unusual (an error, or a char that
+    `JSONTokenizer` might read differently) is found; the input should
+    then be tokenized by `JSONTokenizer`, which makes the error tokens.
+    The json module can't be used for this, since its grammar differs
+    (escapes, "null", exponents, whitespace).
+    """
+    tokens = []
+    append = tokens.append
+
+    def _value(pos: int) -> int:
+        # Read a value at `pos`, return the position after it or -1
+        char = src[pos] if pos < end else ""
+        if char == '"':
+            match = _STRING.match(src, pos, end)
+            if match is None:
+                return -1
+            append(Token(TokenType.string, pos, match.end(), None, lines))
+            return match.end()
+        if char == "{":
+            return _object(pos)
+        if char == "[":
+            return _array(pos)
+        if char == "t" or char == "f":
+            match = _CONSTANT.match(src, pos, end)
+            if match is None:
+                return -1
+            append(Token(TokenType.boolean, pos, match.end(), None, lines))
+            return _SPACES.match(src, match.end(), end).end()
+        match = _NUMBER.match(src, pos, end)
+        if match is None:
+            return -1
+        append(Token(TokenType.number, pos, match.end(), None, lines))
+        return match.end()
+
+    def _object(pos: int) -> int:
+        pos = _SPACES.match(src, pos + 1, end).end() # skip "{"
+        if pos < end and src[pos] == "}":
+            return _SPACES.match(src, pos + 1, end).end()
+        while True:
+            match = _STRING.match(src, pos, end)
+            if match is None:
+                return -1
+            append(Token(TokenType.option, pos, match.end(), None, lines))
+            pos = match.end()
+            if pos >= end or src[pos] != ":":
+                return -1
+            pos = _value(_SPACES.match(src, pos + 1, end).end())
+            if pos < 0:
+                return -1
+            char = src[pos] if pos < end else ""
+            if char == "}":
+                return _SPACES.match(src, pos + 1, end).end()
+            if char != ",":
+                return -1
+            pos = _SPACES.match(src, pos + 1, end).end()
+            if pos < end and src[pos] == "}":
+                return -1 # trailing comma
+
+    def _array(pos: int) -> int:
+        pos = _SPACES.match(src, pos + 1, end).end() # skip "["
+        if pos < end and src[pos] == "]":
+            return _SPACES.match(src, pos + 1, end).end()
+        while True:
+            pos = _value(pos)
+            if pos < 0:
+                return -1
+            char = src[pos] if pos < end else ""
+            if char == "]":
+                return _SPACES.match(src, pos + 1, end).end()
+            if char != ",":
+                return -1
+            pos = _SPACES.match(src, pos + 1, end).end()
+            if pos < end and src[pos] == "]":
+                return -1 # trailing comma
+
+    pos = _SPACES.match(src, begin, end).end()
+    if expect == "any":
+        pos = _value(pos)
+    elif expect == "object":
+        pos = _object(pos) if pos < end and src[pos] == "{" else -1
+    elif expect == "array":
+        pos = _array(pos) if pos < end and src[pos] == "[" else -1
+    else:
+        raise ValueError("Invalid expect type")
+    if pos != end:
+        return None
+    return tokens
+
 if __name__ == "__main__":
     tokenizer = JSONTokenizer('["x", 1, {"x": true}]')
     print(tokenizer.get_tokens())
@@ -0,0 +1,369 @@
+# Command line linter for mcfunction files
+#   python -m mccmdhl [--jobs N] [--version 1.19.80] [--cache-dir DIR]
+#                     [--selector-cache] [--profile table|json] PATH...
+# Every ".mcfunction" file under the PATHs is tokenized, and the errors
+# and warnings found are printed. Files are shared among worker processes.
+# With a cache directory, files that were checked before are not tokenized
+# again unless their content, the version or this package changed.
+# Files larger than `SPLIT_SIZE` are memory mapped instead of read, and
+# split at line ends into parts that workers tokenize in parallel.
+
+import os
+import sys
+import mmap
+import heapq
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+
+from mccmdhl.command import CommandTokenizer
+from mccmdhl.tokenizer_base import TokenType
+from mccmdhl.cache import DiskCache, LRUCache
+from mccmdhl.profiler import Profiler
+from mccmdhl.stream import split_mmap, tokenize_mmap
+
+__all__ = [
+    "find_mcfunctions", "lint_source", "lint_file", "chunk_files",
+    "lint_files", "format_problem", "main"
+]
+
+EXTENSION = ".mcfunction"
+MESSAGE_FORMAT = "{path}:{pos_begin}-{pos_end}: {level}: {message}"
+CHUNKS_PER_JOB = 4 # more chunks than workers to balance the load
+SPLIT_SIZE = 64 * 1024 ** 2
+SELECTOR_CACHE_SIZE = 4096 # selectors remembered by each worker
+
+def find_mcfunctions(paths):
+    # Yield every mcfunction file under `paths` (files or directories)
+    for path in paths:
+        if os.path.isdir(path):
+            for root, dirs, files in os.walk(path):
+                dirs.sort()
+                for name in sorted(files):
+                    if name.endswith(EXTENSION):
+                        yield os.path.join(root, name)
+        else:
+            yield path
+
+def lint_tokenizers(tokenizers) -> list:
+    # Problems found by `tokenizers` (of consecutive parts of a file) as
+    # (pos_begin, pos_end, level, message), where level is "E" or "W",
+    # sorted by position
+    res = []
+    for tokenizer in tokenizers:
+        problems = []
+        for token in tokenizer.get_tokens():
+            if token.type is TokenType.error:
+                problems.append((token.begin, token.end, "E", token))
+        for token in tokenizer.get_warnings():
+            problems.append((token.begin, token.end, "W", token))
+        problems.sort(key=lambda problem: problem[:2])
+        res.extend(
+            (token.pos_begin, token.pos_end, level, str(token.value))
+            for _, _, level, token in problems
+        )
+    return res
+
+def lint_source(
+    src: str, tokenizer_class = CommandTokenizer, profiler: Profiler = None,
+    selector_cache: LRUCache = None
+) -> list:
+    # Problems in `src` (see `lint_tokenizers`)
+    # profiler: a `Profiler` to record into
+    # selector_cache: see `CommandTokenizer`
+    return lint_tokenizers((tokenizer_class(
+        src, profiler=profiler, selector_cache=selector_cache
+    ),))
+
+def _cache_key(cache: DiskCache, content, tokenizer_class) -> str:
+    return cache.key(
+        content, tokenizer_class.__qualname__,
+        tokenizer_class.specialized_version
+            or tokenizer_class.DEFAULT_VERSION
+    )
+
+def lint_file(
+    path: str, tokenizer_class = CommandTokenizer, cache: DiskCache = None,
+    profiler: Profiler = None, selector_cache: LRUCache = None
+) -> list:
+    # Like `lint_source`, but reads the file at `path`
+    # cache: where the result is looked up first and stored; files found
+    # there are not tokenized, so `profiler` does not see them
+    try:
+        with open(path, "rb") as file:
+            content = file.read()
+        src = content.decode("utf-8")
+    except (OSError, UnicodeDecodeError) as err:
+        return [("1.0", "1.0", "E", "Can't read file: %s" % err)]
+    if cache is not None:
+        key = _cache_key(cache, content, tokenizer_class)
+        problems = cache.get(key)
+        if problems is not None:
+            return problems
+    # Universal newlines, like reading in text mode
+    src = src.replace("\r\n", "\n").replace("\r", "\n")
+    try:
+        problems = lint_source(
+            src, tokenizer_class, profiler, selector_cache
+        )
+    except Exception as err:
+        # Don't let one file stop the whole run; the error is not cached
+        # so that the file is tried again next time
+        return [("1.0", "1.0", "E", "Internal error: %r" % err)]
+    if cache is not None:
+        cache.put(key, problems)
+    return problems
+
+def _selector_cache(cache_selectors: bool):
+    return LRUCache(SELECTOR_CACHE_SIZE) if cache_selectors else None
+
+def _lint_chunk(
+    paths: list, version: tuple, cache_dir: str, profile: bool,
+    cache_selectors: bool
+) -> tuple:
+    # Run in worker processes; return the results and the `Profiler` if
+    # `profile` is set (otherwise None). With `cache_selectors`, files of
+    # a chunk share a cache of selectors.
+    tokenizer_class = CommandTokenizer.specialize(version)
+    cache = None if cache_dir is None else DiskCache(cache_dir)
+    selector_cache = _selector_cache(cache_selectors)
+    profiler = Profiler() if profile else None
+    results = [
+        (path, lint_file(
+            path, tokenizer_class, cache, profiler, selector_cache
+        ))
+        for path in paths
+    ]
+    return results, profiler
+
+def _lint_range(
+    path: str, begin: int, end: int, lineno_start: int, version: tuple,
+    profile: bool, cache_selectors: bool
+) -> tuple:
+    # Run in worker processes; lint a part of a large file
+    # (see `split_mmap`) and return (problems, whether the part could be
+    # linted) and the profiler like `_lint_chunk`
+    pos = "%d.0" % lineno_start
+    profiler = Profiler() if profile else None
+    try:
+        problems = lint_tokenizers(tokenize_mmap(
+            path, version, begin, end, lineno_start, profiler=profiler,
+            selector_cache=_selector_cache(cache_selectors)
+        ))
+    except (OSError, UnicodeDecodeError) as err:
+        return ([(pos, pos, "E", "Can't read file: %s" % err)], False), \
+            profiler
+    except Exception as err:
+        return ([(pos, pos, "E", "Internal error: %r" % err)], False), \
+            profiler
+    return (problems, True), profiler
+
+def _split_large(path: str, version: tuple, cache: DiskCache, parts: int):
+    # Map a file larger than `SPLIT_SIZE` and return its cache key, its
+    # cached problems (or None) and the ranges of at most `parts` parts
+    # to lint with `_lint_range`
+    tokenizer_class = CommandTokenizer.specialize(version)
+    key = None
+    try:
+        with open(path, "rb") as file, mmap.mmap(
+            file.fileno(), 0, access=mmap.ACCESS_READ
+        ) as mapping:
+            if cache is not None:
+                key = _cache_key(cache, mapping, tokenizer_class)
+                problems = cache.get(key)
+                if problems is not None:
+                    return key, problems, []
+            return key, None, split_mmap(mapping, parts)
+    except OSError as err:
+        return None, [("1.0", "1.0", "E", "Can't read file: %s" % err)], []
+
+def _file_size(path: str) -> int:
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return 0
+
+def chunk_files(paths: list, chunks: int) -> list:
+    # Split `paths` into at most `chunks` lists of similar total file size
+    # (largest files first, each into the lightest list)
+    bins = [(0, i, []) for i in range(min(chunks, len(paths)))]
+    for path in sorted(paths, key=_file_size, reverse=True):
+        total, i, chunk = heapq.heappop(bins)
+        chunk.append(path)
+        heapq.heappush(bins, (total + _file_size(path), i, chunk))
+    return [chunk for _, _, chunk in bins]
+
+def lint_files(
+    paths: list, version: tuple = None, jobs: int = None,
+    cache_dir: str = None, profiler: Profiler = None,
+    cache_selectors: bool = False
+):
+    # Yield (path, problems) for every file in `paths` (in any order),
+    # using `jobs` processes (defaults to the number of CPUs)
+    # cache_dir: directory of a `DiskCache` to reuse results from
+    # profiler: where the statistics of all the workers are merged
+    # cache_selectors: whether each worker remembers the selectors it
+    # parsed (see `CommandTokenizer`); this only pays off when the same
+    # selectors are used many times
+    if version is None:
+        version = CommandTokenizer.DEFAULT_VERSION
+    if jobs is None:
+        jobs = os.cpu_count() or 1
+    cache = None if cache_dir is None else DiskCache(cache_dir)
+    small, large = [], []
+    for path in paths:
+        (large if _file_size(path) > SPLIT_SIZE else small).append(path)
+    profile = profiler is not None
+    def _merge(result):
+        # Merge the statistics and return the results of a worker
+        results, worker_profiler = result
+        if worker_profiler is not None:
+            profiler.merge(worker_profiler)
+        return results
+    def _join_parts(path, key, results):
+        # Problems of a large file from the results of its parts; they are
+        # only cached if every part could be linted
+        problems = []
+        complete = True
+        for part_problems, part_complete in map(_merge, results):
+            problems.extend(part_problems)
+            complete = complete and part_complete
+        if key is not None and complete:
+            cache.put(key, problems)
+        return path, problems
+    if jobs <= 1 or (len(small) <= 1 and not large):
+        yield from _merge(_lint_chunk(
+            small, version, cache_dir, profile, cache_selectors
+        ))
+        for path in large:
+            key, problems, ranges = _split_large(path, version, cache, 1)
+            if problems is not None:
+                yield path, problems
+                continue
+            yield _join_parts(path, key, (
+                _lint_range(path, *range_, version, profile, cache_selectors)
+                for range_ in ranges
+            ))
+        return
+    chunks = chunk_files(small, jobs * CHUNKS_PER_JOB)
+    with ProcessPoolExecutor(jobs) as executor:
+        futures = [
+            executor.submit(
+                _lint_chunk, chunk, version, cache_dir, profile,
+                cache_selectors
+            )
+            for chunk in chunks
+        ]
+        large_futures = []
+        for path in large:
+            parts = max(jobs, -(-_file_size(path) // SPLIT_SIZE))
+            key, problems, ranges = _split_large(path, version, cache, parts)
+            if problems is not None:
+                yield path, problems
+                continue
+            large_futures.append((path, key, [
+                executor.submit(
+                    _lint_range, path, *range_, version, profile,
+                    cache_selectors
+                )
+                for range_ in ranges
+            ]))
+        for future in futures:
+            yield from _merge(future.result())
+        for path, key, range_futures in large_futures:
+            yield _join_parts(path, key, (
+                future.result() for future in range_futures
+            ))
+
+def format_problem(path: str, problem: tuple) -> str:
+    pos_begin, pos_end, level, message = problem
+    return MESSAGE_FORMAT.format(
+        path=path, pos_begin=pos_begin, pos_end=pos_end,
+        level=level, message=message
+    )
+
+def _parse_version(string: str) -> tuple:
+    try:
+        version = tuple(map(int, string.split(".")))
+    except ValueError:
+        raise argparse.ArgumentTypeError("invalid version: %r" % string)
+    if len(version) != 3:
+        raise argparse.ArgumentTypeError("invalid version: %r" % string)
+    return version
+
+def main(argv = None) -> int:
+    # Returns the exit code: 1 if any error is found, otherwise 0
+    parser = argparse.ArgumentParser(
+        prog="python -m mccmdhl",
+        description="Check the commands in mcfunction files."
+    )
+    parser.add_argument(
+        "paths", nargs="+", metavar="PATH",
+        help="mcfunction file or directory to search for them"
+    )
+    parser.add_argument(
+        "-j", "--jobs", type=int, default=None,
+        help="number of worker processes (default: number of CPUs)"
+    )
+    parser.add_argument(
+        "--version", type=_parse_version,
+        default=CommandTokenizer.DEFAULT_VERSION,
+        help="Minecraft version like 1.19.80 (default: %s)"
+            % ".".join(map(str, CommandTokenizer.DEFAULT_VERSION))
+    )
+    parser.add_argument(
+        "--cache-dir", default=None, metavar="DIR",
+        help="reuse results of unchanged files stored in DIR"
+    )
+    parser.add_argument(
+        "--cache-size", type=int, default=256, metavar="MB",
+        help="size limit of the cache directory (default: 256)"
+    )
+    parser.add_argument(
+        "--selector-cache", action="store_true",
+        help="remember parsed selectors in each worker; faster when the "
+            "same selectors are used many times"
+    )
+    parser.add_argument(
+        "--profile", choices=("table", "json"), default=None,
+        help="print the time spent in each command to stderr "
+            "(files found in the cache are not counted)"
+    )
+    parser.add_argument(
+        "-q", "--quiet", action="store_true",
+        help="only print errors, not warnings"
+    )
+    args = parser.parse_args(argv)
+    min_version = min(CommandTokenizer.get_all_versions())
+    if args.version < min_version:
+        parser.error("versions before %s are not supported"
+                     % ".".join(map(str, min_version)))
+    paths = list(find_mcfunctions(args.paths))
+    profiler = None if args.profile is None else Profiler()
+    results = sorted(
+        lint_files(
+            paths, args.version, args.jobs, args.cache_dir, profiler,
+            args.selector_cache
+        )
+    )
+    if args.cache_dir is not None:
+        DiskCache(args.cache_dir, args.cache_size * 1024 ** 2).trim()
+    errors = warnings = 0
+    for path, problems in results:
+        for problem in problems:
+            if problem[2] == "E":
+                errors += 1
+            else:
+                warnings += 1
+                if args.quiet:
+                    continue
+            print(format_problem(path, problem))
+    if args.profile == "table":
+        print(profiler.table(), file=sys.stderr)
+    elif args.profile == "json":
+        print(profiler.to_json(indent=2), file=sys.stderr)
+    print("%d error(s), %d warning(s) in %d file(s)"
+          % (errors, warnings, len(paths)), file=sys.stderr)
+    return 1 if errors else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
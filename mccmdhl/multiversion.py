@@ -0,0 +1,215 @@
+# Tokenizing a source for many versions at once
+# `tokenize_versions` gives the same result as a `CommandTokenizer` for
+# every version, but each line is only parsed once for every group of
+# versions in which it behaves the same. While a line is parsed, the
+# versioned parts of the tokenizer it uses are recorded: `VersionedMethod`s,
+# commands that exist or change only in some versions (see `GRAMMAR`) and
+# selector, `hasitem` and `haspermission` arguments with a first version.
+# Another version reuses the result if all of them are the same in it,
+# so lines like `say hi` are parsed once and `execute ...` once for every
+# version of `execute` (and of whatever else it uses). Since all the
+# versions tokenize the same source, such a version even shares the token
+# objects of the line; equal lines elsewhere in the source are copied.
+import bisect
+
+from mccmdhl.command import CommandTokenizer
+from mccmdhl.grammar import Versions
+from mccmdhl.version_control import VersionedMethod, MIN_VERSION
+
+__all__ = ["all_versions", "tokenize_versions"]
+
+def all_versions(tokenizer_class = CommandTokenizer) -> list:
+    # Every version in which `tokenizer_class` behaves differently
+    return sorted(tokenizer_class.get_all_versions() | {MIN_VERSION})
+
+def tokenize_versions(
+    src: str, versions = None, tokenizer_class = CommandTokenizer, **kwargs
+) -> dict:
+    # Return {version: tokenizer} for `versions` (defaults to
+    # `all_versions`); use `get_tokens` and `get_warnings` of the
+    # tokenizers as usual. `kwargs` are passed to every tokenizer (like
+    # `lineno_start` or `compact`). A `profiler` only sees the lines that
+    # are really parsed. `line_cache` and `selector_cache` are not
+    # supported: lines are already shared, and a selector taken from a
+    # cache would hide the arguments it uses.
+    for name in ("line_cache", "selector_cache"):
+        if kwargs.get(name) is not None:
+            raise TypeError("tokenize_versions does not support %s" % name)
+    if versions is None:
+        versions = all_versions(tokenizer_class)
+    # line -> [(features used, their variants, relative result)]
+    seen = {}
+    # offset of a line -> [(features used, their variants, tokens,
+    # warnings)]
+    positions = {}
+    return {
+        version: _tracking_class(tokenizer_class, version)(
+            src, seen, positions, **kwargs
+        )
+        for version in versions
+    }
+
+def _features(cls) -> dict:
+    # The versioned parts of `cls`, by the keys `_VersionTracking` records:
+    # key -> the versions in which they change, ascending
+    res = {}
+    commands = {}
+    for attr in dir(cls):
+        value = getattr(cls, attr)
+        if isinstance(value, VersionedMethod):
+            res[("method", attr)] = sorted(value.versions)
+            if attr.startswith("c_"):
+                commands[attr[2:]] = res[("method", attr)]
+    for command, rule in cls.GRAMMAR.items():
+        if isinstance(rule, Versions) and command not in commands \
+                and not hasattr(cls, "c_" + command):
+            commands[command] = sorted(rule.versions)
+    for alias, command in cls.ALIASES.items():
+        if command in commands:
+            commands[alias] = commands[command]
+    for command, versions in commands.items():
+        res[("commands", command)] = versions
+    for schema in (
+        "SELECTOR_ARGUMENTS", "HASITEM_ARGUMENTS", "HASPERMISSION_ARGUMENTS"
+    ):
+        table_versions = set()
+        for name, (method, _, _, since) in getattr(cls, schema).items():
+            versions = {since}
+            reader = getattr(cls, method)
+            if isinstance(reader, VersionedMethod):
+                versions.update(reader.versions)
+            res[(schema, name)] = sorted(versions)
+            table_versions.add(since)
+        # The whole table (listed in the message of an invalid argument)
+        res[(schema, None)] = sorted(table_versions)
+    # Parts that are the same since `MIN_VERSION` never make a difference
+    return {
+        key: versions for key, versions in res.items()
+        if versions[-1] > MIN_VERSION
+    }
+
+class _TrackingTable(dict):
+    # A table of a tokenizer (see `CommandTokenizer.set_version`) that
+    # records the keys looked up into the `touched` of the tokenizer
+    __slots__ = ("tokenizer", "kind")
+
+    def __init__(self, table: dict, tokenizer, kind: str) -> None:
+        super().__init__(table)
+        self.tokenizer = tokenizer
+        self.kind = kind
+
+    def __contains__(self, key) -> bool:
+        self.tokenizer.touched.add((self.kind, key))
+        return super().__contains__(key)
+
+    def __getitem__(self, key):
+        self.tokenizer.touched.add((self.kind, key))
+        return super().__getitem__(key)
+
+    def get(self, key, default = None):
+        self.tokenizer.touched.add((self.kind, key))
+        return super().get(key, default)
+
+    def __iter__(self):
+        self.tokenizer.touched.add((self.kind, None))
+        return super().__iter__()
+
+class _VersionTracking:
+    # Mixed into a specialized tokenizer class by `_tracking_class`
+    FEATURES = {} # result of `_features`
+
+    def __init__(
+        self, src: str, seen: dict, positions: dict, **kwargs
+    ) -> None:
+        self.seen = seen
+        self.positions = positions
+        self.touched = set()
+        super().__init__(src, self.specialized_version, **kwargs)
+
+    def file(self):
+        # The tables are wrapped right before parsing, since a `Profiler`
+        # replaces the command table after `set_version`
+        self.commands = _TrackingTable(self.commands, self, "commands")
+        self.selector_args = _TrackingTable(
+            self.selector_args, self, "SELECTOR_ARGUMENTS"
+        )
+        self.hasitem_args = _TrackingTable(
+            self.hasitem_args, self, "HASITEM_ARGUMENTS"
+        )
+        self.haspermission_args = _TrackingTable(
+            self.haspermission_args, self, "HASPERMISSION_ARGUMENTS"
+        )
+        super().file()
+
+    def variants(self, keys: tuple) -> tuple:
+        # Which variant of each feature in `keys` this version uses
+        features = self.FEATURES
+        return tuple(
+            bisect.bisect_right(features.get(key, ()), self.version)
+            for key in keys
+        )
+
+    def line(self):
+        begin = self.cursor
+        end = self._LINE_REST.match(self.src, begin, self.src_end).end()
+        at_position = self.positions.setdefault(begin, [])
+        for keys, variants, tokens, warnings in at_position:
+            if self.variants(keys) == variants:
+                self.tokens.extend(tokens)
+                self.warnings.extend(warnings)
+                self.jump_to(end)
+                self.forward() # skip \n or EOF
+                return
+        token_count, warning_count = len(self.tokens), len(self.warnings)
+        entries = self.seen.setdefault(self.src[begin:end], [])
+        for keys, variants, result in entries:
+            if self.variants(keys) == variants:
+                self.add_relative_result(begin, result)
+                self.jump_to(end)
+                self.forward() # skip \n or EOF
+                break
+        else:
+            self.touched = set()
+            self.parse_line()
+            keys = tuple(key for key in self.touched if key in self.FEATURES)
+            variants = self.variants(keys)
+            entries.append((keys, variants, self.relative_result(
+                begin, token_count, warning_count
+            )))
+        at_position.append((
+            keys, variants,
+            self.tokens[token_count:], self.warnings[warning_count:]
+        ))
+
+def _tracked(name: str, func):
+    # `func` (a resolved `VersionedMethod`) recording that it was used
+    key = ("method", name)
+    def _method(self, *args, **kwargs):
+        self.touched.add(key)
+        return func(self, *args, **kwargs)
+    return _method
+
+# (class, version) -> result of `_tracking_class`
+_tracking_classes = {}
+
+def _tracking_class(cls, version: tuple) -> type:
+    # A subclass of `cls.specialize(version)` that records the versioned
+    # features used by every line, and shares the results of lines
+    key = (cls, version)
+    res = _tracking_classes.get(key)
+    if res is None:
+        specialized = cls.specialize(version)
+        attrs = {"FEATURES": _features(cls)}
+        for attr in dir(cls):
+            value = getattr(cls, attr)
+            if isinstance(value, VersionedMethod):
+                try:
+                    attrs[attr] = _tracked(attr, value.resolve(version))
+                except NotImplementedError:
+                    pass # not available in this version
+        name = "Tracking" + specialized.__name__
+        attrs["__qualname__"] = name
+        attrs["__module__"] = __name__
+        res = type(name, (_VersionTracking, specialized), attrs)
+        _tracking_classes[key] = res
+    return res
@@ -0,0 +1,174 @@
+# Opt-in profiling of the command tokenizer
+# A `Profiler` passed to `CommandTokenizer(..., profiler=...)` records,
+# for every command handler (including the commands after `execute ... run`)
+# and for selector (`token_target`) and JSON (`token_json`) parsing, how
+# many times it was called, the time spent and the tokens it made, as well
+# as the hits and misses of the tokenizer's line and selector caches.
+# Tokenizers without a profiler run the usual code, so they are not slowed
+# down at all.
+import json
+import time
+
+__all__ = ["Profiler"]
+
+class Profiler:
+    # Statistics of every profiled section, by name:
+    #   "/<command>"   a command handler, like "/execute"
+    #   "token_target" selectors and player names
+    #   "token_json"   JSON text
+    # Each is [calls, total seconds, self seconds, tokens]; "total" includes
+    # nested sections, "self" does not. Tokens include those of nested
+    # sections. One profiler can be shared by many tokenizers, and the
+    # results of several profilers (e.g. from other processes) merged.
+    # `cache_stats` are [hits, misses] of the caches of the tokenizers, by
+    # name ("line_cache" or "selector_cache"). These only count lookups of
+    # the instrumented tokenizers, even if a cache is shared by others.
+    COLUMNS = ("calls", "total", "self", "tokens")
+    CACHES = ("line_cache", "selector_cache")
+
+    def __init__(self) -> None:
+        self.stats = {}
+        self.cache_stats = {}
+        self._nested = [] # time spent in nested sections, for each level
+
+    def wrap(self, name: str, func, tokenizer):
+        # Return `func` (called with any arguments) recording into section
+        # `name`; the tokens counted are those added to `tokenizer.tokens`
+        stats = self.stats
+        nested = self._nested
+        clock = time.perf_counter
+        def _profiled(*args, **kwargs):
+            token_count = len(tokenizer.tokens)
+            nested.append(0.0)
+            begin = clock()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                elapsed = clock() - begin
+                inner = nested.pop()
+                stat = stats.get(name)
+                if stat is None: # sections never called are not listed
+                    stat = stats[name] = [0, 0.0, 0.0, 0]
+                stat[0] += 1
+                stat[1] += elapsed
+                stat[2] += elapsed - inner
+                stat[3] += len(tokenizer.tokens) - token_count
+                if nested:
+                    nested[-1] += elapsed
+        return _profiled
+
+    def instrument(self, tokenizer):
+        # Make `tokenizer` (a `CommandTokenizer`) record into this profiler
+        # by replacing its command table and methods on the instance
+        wrapped = {}
+        commands = {}
+        for name, (command, handler, no_permission) in \
+                tokenizer.commands.items():
+            if command not in wrapped:
+                wrapped[command] = (command, self.wrap(
+                    "/" + command, handler, tokenizer
+                ), no_permission)
+            commands[name] = wrapped[command]
+        tokenizer.commands = commands
+        for method in ("token_target", "token_json"):
+            setattr(tokenizer, method, self.wrap(
+                method, getattr(tokenizer, method), tokenizer
+            ))
+        for name in self.CACHES:
+            cache = getattr(tokenizer, name)
+            if cache is not None:
+                setattr(tokenizer, name, _CountingCache(
+                    cache, self.cache_stats.setdefault(name, [0, 0])
+                ))
+
+    def merge(self, other):
+        # Add the statistics of `other` (a `Profiler` or its `stats`)
+        if isinstance(other, Profiler):
+            for name, values in other.cache_stats.items():
+                stat = self.cache_stats.setdefault(name, [0, 0])
+                stat[0] += values[0]
+                stat[1] += values[1]
+            other = other.stats
+        for name, values in other.items():
+            stat = self.stats.setdefault(name, [0, 0.0, 0.0, 0])
+            for i, value in enumerate(values):
+                stat[i] += value
+
+    def reset(self):
+        self.stats.clear()
+        self.cache_stats.clear()
+
+    def cache_info(self) -> dict:
+        # {name: {"hits": ..., "misses": ..., "hit_rate": ...}} of the caches
+        res = {}
+        for name, (hits, misses) in self.cache_stats.items():
+            lookups = hits + misses
+            res[name] = {
+                "hits": hits,
+                "misses": misses,
+                "hit_rate": hits / lookups if lookups else 0.0,
+            }
+        return res
+
+    def as_dict(self) -> dict:
+        # {name: {"calls": ..., "total": ..., "self": ..., "tokens": ...}}
+        # with the times in seconds
+        return {
+            name: dict(zip(self.COLUMNS, values))
+            for name, values in self.stats.items()
+        }
+
+    def to_json(self, **kwargs) -> str:
+        # {"sections": `as_dict()`, "caches": `cache_info()`};
+        # `kwargs` are passed to `json.dumps`
+        return json.dumps({
+            "sections": self.as_dict(), "caches": self.cache_info()
+        }, **kwargs)
+
+    def table(self, sort: str = "self") -> str:
+        # A text table of the sections, the most costly (by column `sort`)
+        # first
+        column = self.COLUMNS.index(sort)
+        rows = sorted(
+            self.stats.items(), key=lambda item: item[1][column],
+            reverse=True
+        )
+        lines = ["%-20s %10s %12s %12s %10s %10s" % (
+            "section", "calls", "total(ms)", "self(ms)", "tokens", "us/call"
+        )]
+        for name, (calls, total, self_time, tokens) in rows:
+            lines.append("%-20s %10d %12.2f %12.2f %10d %10.1f" % (
+                name, calls, total * 1e3, self_time * 1e3, tokens,
+                total / calls * 1e6 if calls else 0.0
+            ))
+        caches = self.cache_info()
+        if caches:
+            lines.append("")
+            lines.append("%-20s %10s %12s %12s" % (
+                "cache", "hits", "misses", "hit rate"
+            ))
+            for name, info in caches.items():
+                lines.append("%-20s %10d %12d %11.1f%%" % (
+                    name, info["hits"], info["misses"], info["hit_rate"] * 100
+                ))
+        return "\n".join(lines)
+
+    def __repr__(self) -> str:
+        return "<Profiler of %d sections>" % len(self.stats)
+
+class _CountingCache:
+    # A cache (`LRUCache`) that also counts its hits and misses into
+    # `stat` ([hits, misses]), used by `Profiler.instrument`
+    __slots__ = ("cache", "stat")
+
+    def __init__(self, cache, stat: list) -> None:
+        self.cache = cache
+        self.stat = stat
+
+    def get(self, key):
+        value = self.cache.get(key)
+        self.stat[value is None] += 1
+        return value
+
+    def put(self, key, value):
+        self.cache.put(key, value)
@@ -0,0 +1,143 @@
+# Tokenize input of any size line by line
+# Only the current line is kept in memory, so this works for inputs that
+# are too large to read into a string at once. Files can also be memory
+# mapped and split at line ends, so that several processes can tokenize
+# parts of the same file.
+
+import os
+import mmap
+
+from mccmdhl.command import CommandTokenizer
+from mccmdhl.cache import LRUCache
+from mccmdhl.profiler import Profiler
+
+__all__ = [
+    "iter_lines", "tokenize_stream", "iter_mmap_lines", "split_mmap",
+    "tokenize_mmap"
+]
+
+COUNT_BLOCK = 16 * 1024 ** 2 # bytes copied at once to count lines
+
+def iter_lines(chunks):
+    # Re-split the strings from `chunks` (a file object, any iterable of
+    # strings, or a string) into lines without the "\n"
+    # Like tokenizing a whole file, there is no empty last line after
+    # a final "\n".
+    if isinstance(chunks, str):
+        chunks = (chunks,)
+    parts = [] # pieces of the unfinished line
+    for chunk in chunks:
+        if "\n" not in chunk:
+            if chunk:
+                parts.append(chunk)
+            continue
+        lines = chunk.split("\n")
+        if parts:
+            parts.append(lines[0])
+            lines[0] = "".join(parts)
+            parts.clear()
+        last = lines.pop()
+        if last:
+            parts.append(last)
+        yield from lines
+    if parts:
+        yield "".join(parts)
+
+def tokenize_stream(
+    chunks, version = None, tokenizer_class = CommandTokenizer,
+    lineno_start = 1, line_cache: LRUCache = None, profiler: Profiler = None,
+    selector_cache: LRUCache = None
+):
+    # Yield a tokenizer for every line in `chunks` (see `iter_lines`) as
+    # soon as the line is read. Use its `get_tokens` and `get_warnings` as
+    # usual; positions are the ones in the whole input.
+    # lineno_start: line number of the first line
+    # line_cache: see `CommandTokenizer`; useful for generated input with
+    # lots of repeated lines
+    # profiler: a `Profiler` that every line records into
+    # selector_cache: see `CommandTokenizer`; shared by all the lines
+    return _tokenize_lines(
+        iter_lines(chunks), version, tokenizer_class, lineno_start,
+        line_cache, profiler, selector_cache
+    )
+
+def _tokenize_lines(
+    lines, version, tokenizer_class, lineno_start, line_cache, profiler,
+    selector_cache
+):
+    # Yield a tokenizer for every string in `lines`
+    if tokenizer_class.specialized_version is None:
+        if version is None:
+            version = tokenizer_class.DEFAULT_VERSION
+        tokenizer_class = tokenizer_class.specialize(version)
+    for lineno, line in enumerate(lines, lineno_start):
+        yield tokenizer_class(
+            line, version, lineno_start=lineno, line_cache=line_cache,
+            profiler=profiler, selector_cache=selector_cache
+        )
+
+def iter_mmap_lines(mapping, begin = 0, end = None):
+    # Like `iter_lines`, but read UTF-8 text from bytes `begin` to `end`
+    # of `mapping` (an `mmap` or another bytes-like object), decoding one
+    # line at a time; "\r\n" is read as "\n" like in text mode.
+    if end is None:
+        end = len(mapping)
+    find = mapping.find
+    while begin < end:
+        i = find(b"\n", begin, end)
+        if i == -1:
+            i = end
+        line_end = i
+        if line_end > begin and mapping[line_end - 1] == 13: # "\r"
+            line_end -= 1
+        yield mapping[begin:line_end].decode("utf-8")
+        begin = i + 1
+
+def _count_lines(mapping, begin: int, end: int) -> int:
+    # Number of "\n" in bytes `begin` to `end` of `mapping`
+    count = 0
+    for i in range(begin, end, COUNT_BLOCK):
+        count += mapping[i:min(i + COUNT_BLOCK, end)].count(b"\n")
+    return count
+
+def split_mmap(mapping, parts: int) -> list:
+    # Split `mapping` into at most `parts` ranges of similar size that
+    # begin at the start of a line, as (begin, end, lineno_start) that can
+    # be passed to `tokenize_mmap`
+    size = len(mapping)
+    bounds = [0]
+    for k in range(1, parts):
+        i = mapping.find(b"\n", max(size * k // parts, bounds[-1]))
+        if i == -1 or i + 1 >= size:
+            break
+        bounds.append(i + 1)
+    bounds.append(size)
+    ranges = []
+    lineno = 1
+    for begin, end in zip(bounds, bounds[1:]):
+        ranges.append((begin, end, lineno))
+        lineno += _count_lines(mapping, begin, end)
+    return ranges
+
+def tokenize_mmap(
+    path: str, version = None, begin = 0, end = None, lineno_start = 1,
+    tokenizer_class = CommandTokenizer, line_cache: LRUCache = None,
+    profiler: Profiler = None, selector_cache: LRUCache = None
+):
+    # Like `tokenize_stream`, but memory map the file at `path` and only
+    # tokenize bytes `begin` to `end` of it (see `split_mmap`)
+    with open(path, "rb") as file:
+        if os.fstat(file.fileno()).st_size == 0:
+            return # Empty files can't be mapped
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapping:
+            yield from _tokenize_lines(
+                iter_mmap_lines(mapping, begin, end), version,
+                tokenizer_class, lineno_start, line_cache, profiler,
+                selector_cache
+            )
+
+if __name__ == "__main__":
+    import io
+    source = io.StringIO("# Comment\nsay hello\ntp @s ~ ~1 ~\n")
+    for tokenizer in tokenize_stream(source, (1, 19, 80)):
+        print(tokenizer.get_tokens(), tokenizer.get_warnings())
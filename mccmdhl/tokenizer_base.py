@@ -1,16 +1,69 @@
 import enum
-import contextlib
+import re
+import array
+import bisect
 
 from .error import *
 
-__all__ = ["Token", "TokenType", "Tokenizer", "WarningToken"]
+__all__ = [
+    "Token", "TokenType", "Tokenizer", "WarningToken", "LineIndex",
+    "TokenBuffer", "TokenBuilder"
+]
+
+class LineIndex:
+    # Converts offsets in a source string to positions (line, column).
+    # The table of line starts is only built when a position is asked for.
+    def __init__(self, src: str, lineno_start = 1, col_start = 0) -> None:
+        # lineno_start & col_start: position of the first char in `src`
+        self.src = src
+        self.lineno_start = lineno_start
+        self.col_start = col_start
+        self._line_starts = None
+
+    def line_starts(self) -> list:
+        # offsets of the first char of every line
+        if self._line_starts is None:
+            starts = [0]
+            find = self.src.find
+            i = find("\n")
+            while i != -1:
+                starts.append(i + 1)
+                i = find("\n", i + 1)
+            self._line_starts = starts
+        return self._line_starts
+
+    def position(self, offset: int):
+        # (lineno, col) of `offset`
+        starts = self.line_starts()
+        line = bisect.bisect_right(starts, offset) - 1
+        col = offset - starts[line]
+        if line == 0:
+            col += self.col_start
+        return self.lineno_start + line, col
+
+    def index(self, offset: int) -> str:
+        # index in the form of "X.X", like tkinter does
+        return "%d.%d" % self.position(offset)
 
 class Token:
-    def __init__(self, type, pos_begin, pos_end, value) -> None:
+    __slots__ = ("type", "value", "begin", "end", "lines")
+
+    def __init__(self, type, begin, end, value, lines: LineIndex) -> None:
+        # `begin` & `end` are offsets in the source, which `lines`
+        # can convert to "X.X" indexes (see `pos_begin` & `pos_end`)
         self.type = type
         self.value = value
-        self.pos_begin = pos_begin
-        self.pos_end = pos_end
+        self.begin = begin
+        self.end = end
+        self.lines = lines
+    
+    @property
+    def pos_begin(self) -> str:
+        return self.lines.index(self.begin)
+
+    @property
+    def pos_end(self) -> str:
+        return self.lines.index(self.end)
     
     def __repr__(self) -> str:
         return "<Token %s(%s) at %s-%s>" % (
@@ -31,23 +84,132 @@ class TokenType(enum.Enum):
     error = 11 # Unexpected
     warning = 12 # Understood, but probably wrong
 
+_TYPE_FROM_VALUE = {tok_type.value: tok_type for tok_type in TokenType}
+
+class TokenBuffer:
+    # A list of tokens stored in columns of `array.array` rather than as
+    # `Token` instances, which is several times smaller. Indexing or
+    # iterating it gives new `Token` views.
+    def __init__(self, lines: LineIndex, tokens = ()) -> None:
+        self.lines = lines
+        self.types = array.array("B") # `TokenType.value`
+        self.begins = array.array("q")
+        self.ends = array.array("q")
+        self.value_ids = array.array("l") # index in `values` or -1 for None
+        self.values = []
+        self._str_ids = {} # share index of equal string values
+        self.extend(tokens)
+
+    def append(self, token: Token):
+        self.types.append(token.type.value)
+        self.begins.append(token.begin)
+        self.ends.append(token.end)
+        value = token.value
+        if value is None:
+            value_id = -1
+        elif type(value) is str and value in self._str_ids:
+            value_id = self._str_ids[value]
+        else:
+            value_id = len(self.values)
+            self.values.append(value)
+            if type(value) is str:
+                self._str_ids[value] = value_id
+        self.value_ids.append(value_id)
+
+    def extend(self, tokens):
+        for token in tokens:
+            self.append(token)
+
+    def token_at(self, i: int) -> Token:
+        value_id = self.value_ids[i]
+        return Token(
+            _TYPE_FROM_VALUE[self.types[i]], self.begins[i], self.ends[i],
+            None if value_id < 0 else self.values[value_id], self.lines
+        )
+
+    def __len__(self) -> int:
+        return len(self.types)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self.token_at(j) for j in range(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError("token index out of range")
+        return self.token_at(i)
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self.token_at(i)
+
+    def __repr__(self) -> str:
+        return repr(list(self))
+
 class WarningToken(Token):
-    def __init__(self, pos_begin, pos_end, type_: WarningType, **kwargs):
-        self.type = type_
-        self.warning_kwargs = kwargs
-        super().__init__(TokenType.warning, pos_begin, pos_end, str(self))
+    # `value` is a `WarningMessage`, which formats the message when needed
+    __slots__ = ()
+
+    def __init__(self, begin, end, lines, type_: WarningType, **kwargs):
+        super().__init__(
+            TokenType.warning, begin, end,
+            WarningMessage(type_, **kwargs), lines
+        )
+
+    @property
+    def warning_type(self) -> WarningType:
+        return self.value.type
+
+    @property
+    def warning_kwargs(self) -> dict:
+        return self.value.warning_kwargs
     
     def __str__(self) -> str:
-        return self.type.value.format(**self.warning_kwargs)
+        return str(self.value)
+
+class TokenBuilder:
+    # Context manager that finishes the tokens started by
+    # `Tokenizer.create_token`. One builder is reused by all the tokens of a
+    # tokenizer, so the tokens being built are kept in a stack.
+    __slots__ = ("tokenizer", "building")
+
+    def __init__(self, tokenizer) -> None:
+        self.tokenizer = tokenizer
+        self.building = []
+
+    def __enter__(self) -> Token:
+        return self.building[-1]
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        tok = self.building.pop()
+        if exc_type is None:
+            # Token is not recorded when an exception is raised
+            tok.end = self.tokenizer.cursor
+            assert tok.type is not None
+            self.tokenizer.tokens.append(tok)
 
 class Tokenizer:
     EOF = "\x04"
 
-    def __init__(self, src: str, lineno_start = 1, col_start = 0) -> None:
+    # Patterns used to scan several characters in one call
+    _SPACES = re.compile(" *")
+    _LINE_REST = re.compile("[^\n\x04]*")
+
+    def __init__(
+        self, src: str, lineno_start = 1, col_start = 0,
+        begin = 0, end = None, lines: LineIndex = None
+    ) -> None:
         # lineno_start & col_start: position of the first char in `src`
+        # begin & end: only `src[begin:end]` is tokenized
+        # lines: `LineIndex` of `src` to share (e.g. with a parent tokenizer)
+        # `src` is never modified; `cursor` is the index of `current_char`
         self.src = src
-        self.current_lineno = lineno_start
-        self.current_col = col_start - 1
+        self.src_end = len(src) if end is None else end
+        self.cursor = begin - 1
+        if lines is None:
+            lines = LineIndex(src, lineno_start, col_start)
+        self.lines = lines
+        self.token_builder = TokenBuilder(self)
         self.current_char = None
         self.tokens = [] # Result of tokenizing
         self.warnings = [] # Store warning `Token`s
@@ -56,55 +218,60 @@ class Tokenizer:
     @property
     def current_index(self):
         # index in the form of "X.X"
-        return "%d.%d" % (self.current_lineno, self.current_col)
+        return self.lines.index(self.cursor)
     
-    @contextlib.contextmanager
     def create_token(self, type = None, value = None):
-        # `type` and `value` can be completed later using `with ... as tok`
-        tok = Token(type, None, None, value)
-        tok.pos_begin = self.current_index
-        yield tok
-        tok.pos_end = self.current_index
-        assert tok.type is not None
-        self.tokens.append(tok)
+        # Used as `with self.create_token(...) as tok:`; the token covers
+        # the chars read inside the `with` block.
+        # `type` and `value` can be completed later using `tok`
+        builder = self.token_builder
+        builder.building.append(
+            Token(type, self.cursor, None, value, self.lines)
+        )
+        return builder
     
     def warn_at(self, token: Token, type_: WarningType, **kwargs):
         # Create a warning at `token`
         self.warnings.append(WarningToken(
-            token.pos_begin, token.pos_end, type_, **kwargs
+            token.begin, token.end, self.lines, type_, **kwargs
         ))
     
     def forward(self):
-        # Update position
-        self.current_col += 1
-        if self.current_char == "\n":
-            self.current_lineno += 1
-            self.current_col = 0
-        # Move to next char
-        if not self.src:
+        self.cursor += 1
+        if self.cursor < self.src_end:
+            self.current_char = self.src[self.cursor]
+        else:
+            self.current_char = self.EOF
+    
+    def jump_to(self, cursor: int):
+        # Move forward to index `cursor` of `src` in one step
+        self.cursor = cursor
+        if cursor < self.src_end:
+            self.current_char = self.src[cursor]
+        else:
             self.current_char = self.EOF
-            return
-        self.current_char = self.src[0]
-        self.src = self.src[1:]
     
     def peek(self, offset = 0):
         # get the next character
-        try:
-            return self.src[offset]
-        except IndexError:
-            return self.EOF
+        i = self.cursor + 1 + offset
+        if i < self.src_end:
+            return self.src[i]
+        return self.EOF
     
     def skip_spaces(self):
-        while self.current_char == " ":
-            self.forward()
+        if self.current_char == " ":
+            self.jump_to(
+                self._SPACES.match(self.src, self.cursor, self.src_end).end()
+            )
     
     def skip_line(self):
         # skip the whole line
-        res = ""
-        while self.line_not_end():
-            res += self.current_char
-            self.forward()
-        return res
+        if not self.line_not_end():
+            return ""
+        begin = self.cursor
+        end = self._LINE_REST.match(self.src, begin, self.src_end).end()
+        self.jump_to(end)
+        return self.src[begin:end]
 
     def line_not_end(self):
         return self.current_char != "\n" and self.current_char != self.EOF
@@ -121,11 +288,14 @@ class Tokenizer:
         self.skip_spaces()
     
     def expect_char(self, char: str):
-        try:
-            self.char(char)
-        except Error as err:
-            with self.create_token(TokenType.error, err):
-                pass
+        # Like `char`, but an error token is made instead of raising
+        if self.current_char != char:
+            with self.create_token(
+                TokenType.error, Error(ErrorType.EXP_CHAR, char=char)
+            ): pass
+            return
+        self.forward()
+        self.skip_spaces()
     
     def token_list(self, start: str, end: str, allow_empty=True):
         # Used as an generator, read a list of values started with `start`,
@@ -140,13 +310,13 @@ class Tokenizer:
             return
         while self.current_char != end:
             yield
-            try:
-                self.char(",")
-            except Error:
+            if self.current_char != ",":
                 break
-            else: # disallow trailing comma
-                if self.current_char == end:
-                    with self.create_token(
-                        TokenType.error, Error(ErrorType.TRAILING_COMMA)
-                    ): pass
+            self.forward()
+            self.skip_spaces()
+            # disallow trailing comma
+            if self.current_char == end:
+                with self.create_token(
+                    TokenType.error, Error(ErrorType.TRAILING_COMMA)
+                ): pass
         self.expect_char(end)
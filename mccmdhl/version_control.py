@@ -9,23 +9,54 @@ MIN_VERSION = (1, 19, 0)
 
 class VersionedMixin:
     # A class that contains `VersionedMethod`
+    # Set on the classes created by `specialize`
+    specialized_version = None
+
     def set_version(self, version: tuple):
         # The version used in this instance
         assert MIN_VERSION <= version
+        assert self.specialized_version in (None, version)
         self.version = version
 
     @classmethod
     def get_all_versions(cls) -> set:
         # Get all "meaningful" versions
         res = set()
-        for attr in dir(cls):
-            value = getattr(cls, attr)
-            # NOTE this relies on that `Class.versioned_method` returns the
-            # data descriptor itself!!!
-            if isinstance(value, VersionedMethod):
-                res.update(value.versions)
+        for klass in cls.__mro__:
+            for value in vars(klass).values():
+                if isinstance(value, VersionedMethod):
+                    res.update(value.versions)
+        return res
+
+    @classmethod
+    def specialize(cls, version: tuple) -> type:
+        """
+        Return a subclass of `cls` for `version`, in which every
+        `VersionedMethod` is replaced by the plain function that `version`
+        uses, so calling them costs no more than calling normal methods.
+        Classes are cached, so this can be called whenever needed.
+        """
+        key = (cls, version)
+        res = _specialized_classes.get(key)
+        if res is None:
+            attrs = {"specialized_version": version}
+            for attr in dir(cls):
+                value = getattr(cls, attr)
+                if isinstance(value, VersionedMethod):
+                    try:
+                        attrs[attr] = value.resolve(version)
+                    except NotImplementedError:
+                        pass # keep raising when accessed
+            name = "%s_%s" % (cls.__name__, "_".join(map(str, version)))
+            attrs["__qualname__"] = name
+            attrs["__module__"] = cls.__module__
+            res = type(name, (cls,), attrs)
+            _specialized_classes[key] = res
         return res
 
+# (class, version) -> result of `VersionedMixin.specialize`
+_specialized_classes = {}
+
 class VersionedMethod:
     # Data descriptor; a method that has different versions
     def __init__(self):
@@ -58,20 +89,24 @@ class VersionedMethod:
             return func
         return _decorator
 
+    def resolve(self, version: tuple):
+        """Return the function used by instances of `version`."""
+        for v in self.versions:
+            if version >= v:
+                return self.version2func[v]
+        raise NotImplementedError(
+            "No implementation found for version %r" % (version,)
+        )
+
     def __get__(self, instance, owner):
         assert issubclass(owner, VersionedMixin)
         if instance is None:
             # If calling just using the class, return the descriptor itself
             return self
-        for v in self.versions:
-            if instance.version >= v:
-                def _target(*args, **kwargs):
-                    return self.version2func[v](instance, *args, **kwargs)
-                return _target
-        else:
-            raise NotImplementedError(
-                "No implementation found for version %r" % (instance.version,)
-            )
+        func = self.resolve(instance.version)
+        def _target(*args, **kwargs):
+            return func(instance, *args, **kwargs)
+        return _target
 
 def versioned_method(*args, **kwargs):
     """